@@ -0,0 +1,153 @@
+"""Headless batch generation.
+
+Generates a poem for every prompt x poet x model combination, optionally
+analyses each one, and appends one JSON line per finished job to the output
+file. Re-running with the same output file skips jobs that already succeeded
+with the same analyses. Every job makes its own generation request, so
+prompts repeated under different ids in a JSONL file get separate poems.
+
+    GROQ_API_KEY=... python batch.py prompts.txt -o anthology.jsonl \\
+        --models llama-3.1-70b-versatile gemma2-9b-it --analyses "Literature Theory"
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from metrics import start_exporters
+from poetica import ANALYSIS_TYPES, GROQ_MODELS, POET_STYLES, analyze_poem, generate_poem_with_groq, load_poet_data
+
+logger = logging.getLogger("poetica.batch")
+
+
+def read_prompts(path):
+    """Prompts from a text file (one per line, ``#`` comments) or JSONL with a ``prompt`` field."""
+    prompts = []
+    with open(path, 'r', encoding='utf-8') as file:
+        for line in file:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if path.endswith(".jsonl"):
+                record = json.loads(line)
+                prompts.append((record.get("id"), record["prompt"]))
+            else:
+                prompts.append((None, line))
+    return prompts
+
+
+def job_id(prompt_id, prompt, poet, model, language, analyses=()):
+    if prompt_id is None:
+        prompt_id = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12]
+    job = f"{prompt_id}:{poet}:{model}:{language}"
+    if analyses:
+        # A finished job without these analyses must not count as done.
+        job += ":" + "+".join(sorted(analyses))
+    return job
+
+
+def build_jobs(prompts, poets, models, language, analyses=()):
+    jobs = {}
+    for prompt_id, prompt in prompts:
+        for poet in poets:
+            for model in models:
+                job = {
+                    "id": job_id(prompt_id, prompt, poet, model, language, analyses),
+                    "prompt": prompt,
+                    "poet": poet,
+                    "model": model,
+                    "language": language,
+                }
+                jobs.setdefault(job["id"], job)
+    return list(jobs.values())
+
+
+def completed_job_ids(path):
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, 'r', encoding='utf-8') as file:
+        for line in file:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # a line cut short by an interrupted run
+            if "error" not in record:
+                done.add(record["id"])
+    return done
+
+
+def run_job(job, analyses):
+    started = time.perf_counter()
+    record = dict(job)
+    try:
+        poet_data = load_poet_data(job["poet"], job["prompt"], job["model"])
+        if not poet_data:
+            raise FileNotFoundError(f"Sample poems for {job['poet']} not found")
+        record["poem"], record["served_model"] = generate_poem_with_groq(
+            job["prompt"], job["poet"], poet_data, job["model"], job["language"], coalesce=False)
+        record["analyses"] = {
+            analysis_type: analyze_poem(record["poem"], analysis_type, job["model"], job["language"])[0]
+            for analysis_type in analyses
+        }
+    except Exception as error:
+        record["error"] = f"{type(error).__name__}: {error}"
+    record["seconds"] = round(time.perf_counter() - started, 3)
+    return record
+
+
+def run(jobs, output, analyses, workers):
+    done = completed_job_ids(output)
+    pending = [job for job in jobs if job["id"] not in done]
+    logger.info("%d jobs, %d already done, %d to run", len(jobs), len(jobs) - len(pending), len(pending))
+    failures = 0
+    with open(output, 'a', encoding='utf-8') as out, ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run_job, job, analyses) for job in pending]
+        try:
+            for finished, future in enumerate(as_completed(futures), 1):
+                record = future.result()
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out.flush()
+                if "error" in record:
+                    failures += 1
+                    logger.warning("[%d/%d] %s failed: %s", finished, len(pending), record["id"], record["error"])
+                else:
+                    logger.info("[%d/%d] %s done in %.1fs", finished, len(pending), record["id"], record["seconds"])
+        except KeyboardInterrupt:
+            for future in futures:
+                future.cancel()
+            logger.warning("Interrupted; re-run the same command to resume")
+            raise
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate poems in bulk without the Streamlit UI.")
+    parser.add_argument("prompts", help="text file with one prompt per line, or JSONL with id/prompt fields")
+    parser.add_argument("-o", "--output", required=True, help="JSONL file results are appended to")
+    parser.add_argument("--poets", nargs="+", default=list(POET_STYLES), choices=list(POET_STYLES), metavar="POET")
+    parser.add_argument("--models", nargs="+", default=GROQ_MODELS[:1], metavar="MODEL")
+    parser.add_argument("--language", default="id", choices=["en", "id"], help="language of the analyses")
+    parser.add_argument("--analyses", nargs="*", default=[], choices=ANALYSIS_TYPES, metavar="TYPE")
+    parser.add_argument("--workers", type=int, default=4, help="jobs running at once")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    if not os.environ.get("GROQ_API_KEY"):
+        parser.error("set GROQ_API_KEY in the environment")
+    start_exporters()  # POETICA_METRICS_FILE / POETICA_METRICS_PORT, if set
+
+    jobs = build_jobs(read_prompts(args.prompts), args.poets, args.models, args.language, args.analyses)
+    try:
+        failures = run(jobs, args.output, args.analyses, args.workers)
+    except KeyboardInterrupt:
+        return 130
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
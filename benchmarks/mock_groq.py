@@ -0,0 +1,152 @@
+"""A local stand-in for the Groq chat completions API.
+
+Serves ``POST /openai/v1/chat/completions`` in the OpenAI/Groq wire format,
+streamed or not, with configurable time-to-first-token, token rate and
+rate-limit errors. Point the Groq client at it with ``GROQ_BASE_URL`` or
+``Groq(base_url=...)``.
+
+    python -m benchmarks.mock_groq --port 8765 --ttft 0.2 --tokens-per-second 300
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FILLER = (
+    "angin membawa kabar dari laut yang jauh dan hujan menulis namamu di kaca jendela "
+    "sementara waktu berjalan pelan di antara daun daun yang gugur"
+).split()
+
+
+class MockGroqServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address=("127.0.0.1", 0), ttft=0.2, tokens_per_second=300.0, response_tokens=120,
+                 recorded=None, error_rate=0.0):
+        super().__init__(address, _Handler)
+        self.ttft = ttft
+        self.tokens_per_second = tokens_per_second
+        self.response_tokens = response_tokens
+        self.recorded = recorded or []  # [{"match": substring of the prompt, "content": reply}]
+        self.error_rate = error_rate
+        self._lock = threading.Lock()
+        self.calls = {}
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def record_call(self, model):
+        with self._lock:
+            self.calls[model] = self.calls.get(model, 0) + 1
+
+    def total_calls(self):
+        with self._lock:
+            return sum(self.calls.values())
+
+    def reply_for(self, messages, max_tokens):
+        prompt = "\n".join(message.get("content", "") for message in messages)
+        for entry in self.recorded:
+            if entry["match"] in prompt:
+                return entry["content"].split(" ")
+        count = min(self.response_tokens, max_tokens or self.response_tokens)
+        return [FILLER[i % len(FILLER)] for i in range(count)]
+
+    def start(self):
+        thread = threading.Thread(target=self.serve_forever, name="mock-groq", daemon=True)
+        thread.start()
+        return self
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload, headers=()):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        if not self.path.endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "not found", "type": "invalid_request_error"}})
+            return
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        server = self.server
+        server.record_call(request["model"])
+        if server.error_rate and random.random() < server.error_rate:
+            self._send_json(429, {"error": {"message": "Rate limit reached", "type": "tokens", "code": "rate_limit_exceeded"}},
+                            headers=[("retry-after", "0.1")])
+            return
+        words = server.reply_for(request["messages"], request.get("max_tokens"))
+        prompt_tokens = sum(len(message.get("content", "")) // 4 for message in request["messages"])
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": len(words),
+                 "total_tokens": prompt_tokens + len(words)}
+        base = {"id": "chatcmpl-mock", "created": int(time.time()), "model": request["model"]}
+        interval = 1.0 / server.tokens_per_second
+        time.sleep(server.ttft)
+        if not request.get("stream"):
+            time.sleep(interval * len(words))
+            self._send_json(200, dict(base, object="chat.completion", usage=usage, choices=[{
+                "index": 0, "finish_reason": "stop",
+                "message": {"role": "assistant", "content": " ".join(words)},
+            }]))
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        try:
+            for index, word in enumerate(words):
+                self._send_event(dict(base, object="chat.completion.chunk", choices=[{
+                    "index": 0, "finish_reason": None,
+                    "delta": {"content": word if index == 0 else " " + word},
+                }]))
+                time.sleep(interval)
+            self._send_event(dict(base, object="chat.completion.chunk", x_groq={"id": "mock", "usage": usage},
+                                  choices=[{"index": 0, "finish_reason": "stop", "delta": {}}]))
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # client cancelled the stream
+
+    def _send_event(self, payload):
+        self.wfile.write(f"data: {json.dumps(payload)}\n\n".encode("utf-8"))
+        self.wfile.flush()
+
+
+def load_recorded(path):
+    if not path:
+        return []
+    with open(path, 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a fake Groq chat completions API.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--ttft", type=float, default=0.2, help="seconds before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=300.0)
+    parser.add_argument("--response-tokens", type=int, default=120, help="length of generated filler replies")
+    parser.add_argument("--recorded", help="JSON list of {match, content} canned replies")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 429")
+    args = parser.parse_args()
+    server = MockGroqServer(("127.0.0.1", args.port), args.ttft, args.tokens_per_second, args.response_tokens,
+                            load_recorded(args.recorded), args.error_rate)
+    print(f"Mock Groq API listening on {server.url}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+"""Offline benchmarks against the mock Groq server.
+
+Drives the real app through Streamlit's AppTest (every ``run()`` is a full
+script rerun) and the generation functions directly, with the Groq client
+pointed at ``benchmarks.mock_groq``. No API key or network is needed.
+
+    python -m benchmarks.run                  # compare against benchmarks/baseline.json
+    python -m benchmarks.run --save-baseline  # record a new baseline
+
+Each scenario reports p50/p95 latency per user action, throughput, and how
+many upstream calls one action caused; the streaming scenario also reports
+time-to-first-token and tokens per second. Scenarios are isolated from each
+other, so any subset compares fairly against a full baseline.
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import numpy as np
+from groq import Groq
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.mock_groq import MockGroqServer, load_recorded  # noqa: E402
+from gateway import GroqGateway, reset_shared_gateway, shared_gateway  # noqa: E402
+from poetica import GROQ_MODELS, get_corpus, reset_corpus, stream_poem_with_groq  # noqa: E402
+from prosody import analyze as analyze_prosody  # noqa: E402
+
+APP_PATH = os.path.join(ROOT, "app.py")
+BASELINE_PATH = os.path.join(ROOT, "benchmarks", "baseline.json")
+RESPONSES_PATH = os.path.join(ROOT, "benchmarks", "responses.json")
+
+# Lower is better for everything we compare except these.
+HIGHER_IS_BETTER = {"throughput_per_s", "tokens_per_s"}
+
+
+def percentiles(samples):
+    return {
+        "p50_ms": round(1000 * float(np.percentile(samples, 50)), 1),
+        "p95_ms": round(1000 * float(np.percentile(samples, 95)), 1),
+    }
+
+
+def settle(server, quiet=0.5, timeout=30):
+    """Wait until background work (e.g. the poet info prewarm) stops calling upstream."""
+    deadline = time.monotonic() + timeout
+    last = server.total_calls()
+    while time.monotonic() < deadline:
+        time.sleep(quiet)
+        current = server.total_calls()
+        if current == last:
+            return
+        last = current
+
+
+def new_session():
+    from streamlit import config
+    from streamlit.testing.v1 import AppTest
+
+    # Magic rewrites the script with ast.parse on every AppTest; concurrent
+    # parses trip a CPython 3.11 AST race, and app.py does not rely on magic.
+    config.set_option("runner.magicEnabled", False)
+    app = AppTest.from_file(APP_PATH, default_timeout=120)
+    app.secrets["GROQ_API_KEY"] = "benchmark"
+    return app
+
+
+@contextmanager
+def isolated(server, limits):
+    """Run one scenario from cold state, independent of the scenarios before it.
+
+    Each gets a new working directory (the app keeps its disk caches and
+    request counter there), new Streamlit resource caches, a new gateway
+    with empty buckets and in-flight table, and a reloaded corpus.
+    """
+    from streamlit import cache_resource
+
+    cache_resource.clear()
+    reset_shared_gateway()
+    reset_corpus()
+    analyze_prosody.cache_clear()
+    shared_gateway(lambda: GroqGateway(Groq(api_key="benchmark", base_url=server.url, max_retries=0),
+                                       GROQ_MODELS, limits=limits))
+    previous = os.getcwd()
+    workdir = tempfile.mkdtemp(prefix="poetica-bench-")
+    os.chdir(workdir)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def timed(action):
+    started = time.perf_counter()
+    action()
+    return time.perf_counter() - started
+
+
+def run_sessions(server, sessions, session_fn):
+    """Run ``session_fn(index)`` for each session concurrently; it returns per-action latencies."""
+    calls_before = server.total_calls()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        latencies = [latency for result in pool.map(session_fn, range(sessions)) for latency in result]
+    elapsed = time.perf_counter() - started
+    settle(server)
+    result = percentiles(latencies)
+    result["actions"] = len(latencies)
+    result["throughput_per_s"] = round(len(latencies) / elapsed, 2)
+    result["upstream_per_action"] = round((server.total_calls() - calls_before) / len(latencies), 2)
+    return result
+
+
+def scenario_reruns(server, sessions, actions):
+    # A user typing a prompt: every keystroke reruns the whole script.
+    def session(index):
+        app = new_session()
+        latencies = [timed(app.run)]
+        for keystroke in range(actions):
+            app.text_area[0].input(f"hujan bulan juni {index} {keystroke}")
+            latencies.append(timed(app.run))
+        return latencies
+
+    return run_sessions(server, sessions, session)
+
+
+def scenario_generate(server, sessions, actions):
+    def session(index):
+        app = new_session()
+        app.run()
+        latencies = []
+        for action in range(actions):
+            app.text_area[0].input(f"kota dan lapar {index} {action}")
+            next(button for button in app.button if button.label == "Generate Poem").click()
+            latencies.append(timed(app.run))
+        return latencies
+
+    return run_sessions(server, sessions, session)
+
+
+def scenario_full_analysis(server, sessions, actions):
+    # Every session analyses the same sample poems, as classes do with canonical texts.
+    poems = [get_corpus().poem("Chairil Anwar", index % 3) for index in range(actions)]
+
+    def session(index):
+        app = new_session()
+        app.run()
+        latencies = []
+        for poem in poems:
+            next(area for area in app.text_area if "all three" in area.label).input(poem)
+            next(button for button in app.button if button.label == "Run all analyses").click()
+            latencies.append(timed(app.run))
+        return latencies
+
+    return run_sessions(server, sessions, session)
+
+
+def scenario_stream(server, sessions, actions):
+    model = GROQ_MODELS[0]
+    poet_data = get_corpus().text("Sapardi Djoko Damono")
+    lock = threading.Lock()
+    ttfts, rates = [], []
+
+    def session(index):
+        latencies = []
+        for action in range(actions):
+            started = time.perf_counter()
+            first = None
+            chunks = 0
+            for _ in stream_poem_with_groq(f"senja {index} {action}", "Sapardi Djoko Damono", poet_data, model, "id"):
+                first = first or time.perf_counter()
+                chunks += 1
+            finished = time.perf_counter()
+            latencies.append(finished - started)
+            with lock:
+                ttfts.append(first - started)
+                rates.append(chunks / max(finished - first, 1e-9))
+        return latencies
+
+    result = run_sessions(server, sessions, session)
+    ttft = percentiles(ttfts)
+    result["ttft_p50_ms"] = ttft["p50_ms"]
+    result["ttft_p95_ms"] = ttft["p95_ms"]
+    result["tokens_per_s"] = round(float(np.median(rates)), 1)
+    return result
+
+
+SCENARIOS = {
+    "reruns": scenario_reruns,
+    "generate": scenario_generate,
+    "full_analysis": scenario_full_analysis,
+    "stream": scenario_stream,
+}
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    print(f"{'scenario':<15}{'metric':<22}{'baseline':>12}{'current':>12}{'change':>10}")
+    for scenario, metrics in results.items():
+        for metric, value in metrics.items():
+            if metric == "actions":
+                continue
+            previous = baseline.get(scenario, {}).get(metric)
+            change = ""
+            if previous:
+                delta = (value - previous) / previous * 100
+                change = f"{delta:+.0f}%"
+                worse = -delta if metric in HIGHER_IS_BETTER else delta
+                if tolerance is not None and worse > tolerance:
+                    regressions.append(f"{scenario}.{metric}")
+                    change += " !"
+            print(f"{scenario:<15}{metric:<22}{'' if previous is None else previous:>12}{value:>12}{change:>10}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark Poetica against a local mock Groq server.")
+    parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument("--sessions", type=int, default=4, help="concurrent simulated users")
+    parser.add_argument("--actions", type=int, default=5, help="user actions per session")
+    parser.add_argument("--ttft", type=float, default=0.2, help="mock seconds to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=300.0, help="mock streaming rate")
+    parser.add_argument("--response-tokens", type=int, default=120, help="mock reply length without a recording")
+    parser.add_argument("--recorded", default=RESPONSES_PATH, help="canned replies for the mock server")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of mock requests answered with 429")
+    parser.add_argument("--production-limits", action="store_true",
+                        help="keep the gateway's real per-model rate limits instead of lifting them")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--fail-on-regression", type=float, metavar="PCT",
+                        help="exit non-zero if any metric is more than PCT percent worse than the baseline")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    server = MockGroqServer(ttft=args.ttft, tokens_per_second=args.tokens_per_second,
+                            response_tokens=args.response_tokens, recorded=load_recorded(args.recorded),
+                            error_rate=args.error_rate).start()
+    os.environ["GROQ_BASE_URL"] = server.url
+    limits = None if args.production_limits else {model: (10 ** 6, 10 ** 9) for model in GROQ_MODELS}
+
+    results = {}
+    for name in args.scenarios:
+        print(f"running {name}...", file=sys.stderr)
+        with isolated(server, limits):
+            results[name] = SCENARIOS[name](server, args.sessions, args.actions)
+    server.shutdown()
+
+    config = {key: value for key, value in vars(args).items()
+              if key not in ("baseline", "save_baseline", "fail_on_regression", "json", "recorded", "scenarios")}
+    baseline, baseline_config = {}, None
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as file:
+            recorded = json.load(file)
+        baseline, baseline_config = recorded.get("results", {}), recorded.get("config")
+    regressions = compare(results, baseline, args.fail_on_regression)
+    if baseline_config is not None and baseline_config != config:
+        differences = ", ".join(f"{key}={config.get(key)!r} (baseline {baseline_config.get(key)!r})"
+                                for key in sorted(set(config) | set(baseline_config))
+                                if config.get(key) != baseline_config.get(key))
+        print(f"Settings differ from the baseline, so the figures are not comparable: {differences}",
+              file=sys.stderr)
+
+    report = {"config": config, "results": results}
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+            file.write("\n")
+    elif baseline_config not in (None, config) and args.fail_on_regression is not None:
+        return 2
+    if regressions:
+        print("Regressions: " + ", ".join(regressions), file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
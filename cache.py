@@ -0,0 +1,214 @@
+import atexit
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from contextlib import contextmanager
+
+from retrieval import estimate_tokens
+
+
+class DiskCache:
+    """SQLite-backed key/value cache shared by every session and process.
+
+    Entries expire after ``ttl`` seconds and the least recently used ones are
+    evicted once the cache holds more than ``max_entries`` items or
+    ``max_bytes`` of values.
+
+    Lookups only read. Hit/miss counts and access times are buffered in
+    memory and written together at most every ``flush_interval`` seconds
+    (and before evicting, and at exit).
+    """
+
+    def __init__(self, path, ttl=7 * 24 * 3600, max_entries=1000, max_bytes=5 * 1024 * 1024, flush_interval=5.0):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._pending_lock = threading.Lock()
+        self._pending_stats = {}
+        self._pending_access = {}
+        self._flushed_at = time.monotonic()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created REAL NOT NULL,
+                    accessed REAL NOT NULL
+                )"""
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+            conn.execute("CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value REAL NOT NULL)")
+        atexit.register(self.flush)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA synchronous=NORMAL")  # durable enough for a cache under WAL
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def make_key(*parts):
+        return json.dumps(parts, ensure_ascii=False)
+
+    def get(self, key, default=None):
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute("SELECT value, created FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is not None and self.ttl is not None and now - row[1] > self.ttl:
+            row = None  # deleted by the next eviction
+        with self._pending_lock:
+            if row is None:
+                self._pending_stats["misses"] = self._pending_stats.get("misses", 0) + 1
+            else:
+                self._pending_stats["hits"] = self._pending_stats.get("hits", 0) + 1
+                self._pending_access[key] = now
+            due = time.monotonic() - self._flushed_at >= self.flush_interval
+        if due:
+            self.flush()
+        return default if row is None else json.loads(row[0])
+
+    def flush(self):
+        """Write buffered stats and access times in one transaction."""
+        with self._pending_lock:
+            stats, accessed = self._pending_stats, self._pending_access
+            self._pending_stats, self._pending_access = {}, {}
+            self._flushed_at = time.monotonic()
+        if not stats and not accessed:
+            return
+        with self._lock, self._connect() as conn:
+            conn.executemany("UPDATE entries SET accessed = ? WHERE key = ?",
+                             [(when, key) for key, when in accessed.items()])
+            for name, amount in stats.items():
+                self._add_stat(conn, name, amount)
+
+    def set(self, key, value):
+        payload = json.dumps(value, ensure_ascii=False)
+        self.flush()  # eviction below needs current access times
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, payload, len(payload.encode("utf-8")), now, now),
+            )
+            self._evict(conn, now)
+
+    def _evict(self, conn, now):
+        if self.ttl is not None:
+            conn.execute("DELETE FROM entries WHERE created < ?", (now - self.ttl,))
+        count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        # Walk from least to most recently used until we are back under both limits.
+        stale = []
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY accessed ASC"):
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            stale.append((key,))
+            count -= 1
+            total -= size
+        conn.executemany("DELETE FROM entries WHERE key = ?", stale)
+
+    @staticmethod
+    def _add_stat(conn, name, amount):
+        conn.execute(
+            "INSERT INTO stats (name, value) VALUES (?, ?) ON CONFLICT (name) DO UPDATE SET value = value + excluded.value",
+            (name, amount),
+        )
+
+    def add_stat(self, name, amount):
+        with self._pending_lock:
+            self._pending_stats[name] = self._pending_stats.get(name, 0) + amount
+
+    def stats(self):
+        """Counters shared by every process using this cache file: hits, misses and any added via add_stat.
+
+        Includes this process's unflushed counts; other processes' appear once they flush.
+        """
+        with self._connect() as conn:
+            stats = dict(conn.execute("SELECT name, value FROM stats"))
+        with self._pending_lock:
+            for name, amount in self._pending_stats.items():
+                stats[name] = stats.get(name, 0) + amount
+        stats.setdefault("hits", 0)
+        stats.setdefault("misses", 0)
+        return stats
+
+    def clear(self):
+        with self._pending_lock:
+            self._pending_access.clear()
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM entries")
+
+
+def normalize_text(text):
+    """Canonical form of a poem or prompt: NFKC, trimmed lines, single blank lines between stanzas."""
+    lines = [line.strip() for line in unicodedata.normalize("NFKC", text).strip().splitlines()]
+    normalized = []
+    for line in lines:
+        if line or (normalized and normalized[-1]):
+            normalized.append(" ".join(line.split()))
+    return "\n".join(normalized)
+
+
+class ResultCache:
+    """Content-addressed cache of LLM results on top of a ``DiskCache``.
+
+    Keys hash the normalized input text, so the same poem pasted with
+    different whitespace hits the same entry. Each entry remembers how long
+    it took and roughly how many tokens it produced, and every hit adds those
+    to the ``saved_seconds`` and ``saved_tokens`` stats.
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    @staticmethod
+    def key(kind, text, *parts):
+        digest = hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+        return DiskCache.make_key(kind, digest, *parts)
+
+    def get(self, key):
+        entry = self.cache.get(key)
+        if entry is None:
+            return None
+        self.cache.add_stat("saved_seconds", entry["seconds"])
+        self.cache.add_stat("saved_tokens", entry["tokens"])
+        return entry["text"]
+
+    def put(self, key, text, seconds):
+        self.cache.set(key, {"text": text, "seconds": seconds, "tokens": estimate_tokens(text)})
+
+    def fetch(self, key, compute, bypass=False):
+        """Return ``(text, served_from_cache)``, calling ``compute()`` on a miss or when bypassed.
+
+        ``compute()`` returns ``(text, cacheable)``; results it marks as not
+        cacheable are returned without being stored.
+        """
+        if not bypass:
+            text = self.get(key)
+            if text is not None:
+                return text, True
+        started = time.perf_counter()
+        text, cacheable = compute()
+        if cacheable:
+            self.put(key, text, time.perf_counter() - started)
+        return text, False
+
+    def stats(self):
+        return self.cache.stats()
@@ -0,0 +1,198 @@
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def poet_key(poet_name):
+    return poet_name.lower().replace(' ', '_')
+
+
+class _PoetEntry:
+    """Poems for one poet, either held in memory or located by byte offset."""
+
+    def __init__(self, name, signature):
+        self.name = name
+        self.signature = signature
+        self.poems = []  # in-memory poems from a .json file
+        self.offsets = []  # (path, offset, length) of each poem line in .jsonl files
+        self.total_chars = 0
+
+    @property
+    def poem_count(self):
+        return len(self.poems) + len(self.offsets)
+
+
+class PoetCorpus:
+    """In-memory index over ``poet_samples``, independent of Streamlit.
+
+    Each poet is stored as one of:
+
+    * ``<poet>.json`` -- ``{"name": ..., "poems": [...]}``, loaded whole;
+    * ``<poet>.jsonl`` -- one ``{"poem": ...}`` object per line;
+    * ``<poet>/*.jsonl`` -- the same line format sharded over several files.
+
+    JSONL poems are indexed by byte offset so a single poem can be read
+    without parsing the rest of the collection. Files are re-read only when
+    their mtime or size changes, checked at most every ``check_interval``
+    seconds.
+    """
+
+    def __init__(self, directory="poet_samples", check_interval=2.0):
+        self.directory = directory
+        self.check_interval = check_interval
+        self._lock = threading.RLock()
+        self._entries = {}
+        self._failed = {}  # poet key -> signature of the files that failed to load
+        self._checked_at = 0.0
+        self.refresh(force=True)
+
+    def _sources(self):
+        sources = {}
+        if not os.path.isdir(self.directory):
+            return sources
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith((".json", ".jsonl")):
+                key = entry.name.rsplit(".", 1)[0]
+                sources.setdefault(key, []).append(entry.path)
+            elif entry.is_dir():
+                shards = sorted(
+                    shard.path for shard in os.scandir(entry.path)
+                    if shard.is_file() and shard.name.endswith(".jsonl")
+                )
+                if shards:
+                    sources.setdefault(entry.name, []).extend(shards)
+        return {key: sorted(paths) for key, paths in sources.items()}
+
+    @staticmethod
+    def _signature(paths):
+        signature = []
+        for path in paths:
+            stat = os.stat(path)
+            signature.append((path, stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+
+    def refresh(self, force=False):
+        with self._lock:
+            now = time.monotonic()
+            if not force and now - self._checked_at < self.check_interval:
+                return
+            self._checked_at = now
+            entries = {}
+            for key, paths in self._sources().items():
+                current = self._entries.get(key)
+                try:
+                    signature = self._signature(paths)
+                except OSError as error:  # removed between listing and stat
+                    logger.warning("Could not read sample poems for %s: %s", key, error)
+                    continue
+                if current is not None and current.signature == signature:
+                    entries[key] = current
+                    continue
+                if self._failed.get(key) != signature:
+                    try:
+                        entries[key] = self._load(key, paths, signature)
+                        self._failed.pop(key, None)
+                        continue
+                    except (OSError, ValueError, KeyError, TypeError) as error:
+                        logger.warning("Could not load sample poems for %s: %s", key, error)
+                        self._failed[key] = signature
+                # A malformed or half-saved file only affects its own poet. Its
+                # last good in-memory poems stay usable; byte offsets into a
+                # changed .jsonl file do not.
+                if current is not None and not current.offsets:
+                    entries[key] = current
+            self._entries = entries
+
+    def _load(self, key, paths, signature):
+        entry = _PoetEntry(key.replace('_', ' ').title(), signature)
+        for path in paths:
+            if path.endswith(".jsonl"):
+                self._index_jsonl(entry, path)
+            else:
+                with open(path, 'r', encoding='utf-8') as file:
+                    data = json.load(file)
+                poems = data.get("poems") if isinstance(data, dict) else None
+                if not isinstance(poems, list) or not all(isinstance(poem, str) for poem in poems):
+                    raise ValueError(f'{path} must be an object with a "poems" list of strings')
+                entry.name = data.get("name", entry.name)
+                entry.poems.extend(data["poems"])
+                entry.total_chars += sum(len(poem) for poem in data["poems"])
+        return entry
+
+    @staticmethod
+    def _index_jsonl(entry, path):
+        offset = 0
+        with open(path, 'rb') as file:
+            for line in file:
+                length = len(line)
+                if line.strip():
+                    record = json.loads(line)
+                    if isinstance(record, dict) and "poem" not in record:
+                        entry.name = record.get("name", entry.name)  # header line
+                    else:
+                        poem = record["poem"] if isinstance(record, dict) else record
+                        if not isinstance(poem, str):
+                            raise ValueError(f"{path}: line at byte {offset} is not a poem string")
+                        entry.offsets.append((path, offset, length))
+                        entry.total_chars += len(poem)
+                offset += length
+
+    def _entry(self, poet_name):
+        self.refresh()
+        entry = self._entries.get(poet_key(poet_name))
+        if entry is None:
+            raise FileNotFoundError(f"No sample poems for {poet_name} in {self.directory}")
+        return entry
+
+    @staticmethod
+    def _read(path, offset, length):
+        with open(path, 'rb') as file:
+            file.seek(offset)
+            record = json.loads(file.read(length))
+        return record["poem"] if isinstance(record, dict) else record
+
+    def poets(self):
+        self.refresh()
+        return sorted(self._entries)
+
+    def version(self, poet_name):
+        return self._entry(poet_name).signature
+
+    def metadata(self, poet_name):
+        entry = self._entry(poet_name)
+        return {
+            "name": entry.name,
+            "poem_count": entry.poem_count,
+            "total_chars": entry.total_chars,
+            "files": [path for path, _, _ in entry.signature],
+        }
+
+    def poem(self, poet_name, index):
+        entry = self._entry(poet_name)
+        if index < len(entry.poems):
+            return entry.poems[index]
+        return self._read(*entry.offsets[index - len(entry.poems)])
+
+    def poems(self, poet_name):
+        entry = self._entry(poet_name)
+        yield from entry.poems
+        file = None
+        try:
+            for path, offset, length in entry.offsets:
+                if file is None or file.name != path:
+                    if file is not None:
+                        file.close()
+                    file = open(path, 'rb')
+                file.seek(offset)
+                record = json.loads(file.read(length))
+                yield record["poem"] if isinstance(record, dict) else record
+        finally:
+            if file is not None:
+                file.close()
+
+    def text(self, poet_name):
+        return "\n\n".join(self.poems(poet_name))
@@ -0,0 +1,108 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from metrics import LOCAL_SECONDS
+
+DIMENSIONS = ("operation", "poet", "model", "language")
+
+
+class RequestCounter:
+    """Request counts in an embedded SQLite database (WAL mode).
+
+    Every increment is a single UPSERT, so concurrent threads and processes
+    never lose updates. Reads for display go through an in-memory snapshot
+    that is refreshed at most every ``cache_ttl`` seconds, or after this
+    process increments.
+    """
+
+    def __init__(self, path, legacy_path=None, cache_ttl=30):
+        self.path = path
+        self.cache_ttl = cache_ttl
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._loaded_at = 0.0
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS counts (
+                    operation TEXT NOT NULL,
+                    poet TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    language TEXT NOT NULL,
+                    count INTEGER NOT NULL,
+                    PRIMARY KEY (operation, poet, model, language)
+                )"""
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        if legacy_path:
+            self._migrate_json(legacy_path)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _migrate_json(self, legacy_path):
+        # Imports the old {"total_requests": n} file once; the legacy counter only
+        # ever tracked generations, without any breakdown.
+        if not os.path.exists(legacy_path):
+            return
+        with open(legacy_path, "r") as f:
+            total = json.load(f).get("total_requests", 0)
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            migrated = conn.execute("SELECT 1 FROM meta WHERE key = 'migrated_json'").fetchone()
+            if migrated:
+                return
+            if total:
+                self._add(conn, ("generate", "", "", ""), total)
+            conn.execute("INSERT INTO meta (key, value) VALUES ('migrated_json', ?)", (legacy_path,))
+
+    @staticmethod
+    def _add(conn, key, amount):
+        conn.execute(
+            """INSERT INTO counts (operation, poet, model, language, count) VALUES (?, ?, ?, ?, ?)
+               ON CONFLICT (operation, poet, model, language) DO UPDATE SET count = count + excluded.count""",
+            (*key, amount),
+        )
+
+    def increment(self, operation, poet="", model="", language=""):
+        with LOCAL_SECONDS.time(operation="counter_increment"), self._connect() as conn:
+            self._add(conn, (operation, poet, model, language), 1)
+            total = conn.execute("SELECT COALESCE(SUM(count), 0) FROM counts").fetchone()[0]
+        with self._lock:
+            self._loaded_at = 0.0
+        return total
+
+    def _load(self):
+        with self._lock:
+            if self._snapshot is not None and time.monotonic() - self._loaded_at < self.cache_ttl:
+                return self._snapshot
+        with LOCAL_SECONDS.time(operation="counter_load"), self._connect() as conn:
+            rows = conn.execute(f"SELECT {', '.join(DIMENSIONS)}, count FROM counts").fetchall()
+        snapshot = {"total": 0}
+        snapshot.update({dimension: {} for dimension in DIMENSIONS})
+        for row in rows:
+            count = row[-1]
+            snapshot["total"] += count
+            for dimension, value in zip(DIMENSIONS, row):
+                if value:
+                    snapshot[dimension][value] = snapshot[dimension].get(value, 0) + count
+        with self._lock:
+            self._snapshot = snapshot
+            self._loaded_at = time.monotonic()
+        return snapshot
+
+    def total(self):
+        return self._load()["total"]
+
+    def breakdown(self, dimension):
+        return dict(self._load()[dimension])
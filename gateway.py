@@ -0,0 +1,234 @@
+import hashlib
+import json
+import random
+import threading
+import time
+from concurrent.futures import Future
+
+import groq
+
+from metrics import COALESCED, OPERATION_SECONDS, UPSTREAM_SECONDS, count_upstream_request, record_usage
+from retrieval import estimate_tokens
+
+# Requests and tokens per minute allowed per model. The defaults follow Groq's
+# free tier; raise them for paid plans.
+DEFAULT_LIMITS = (30, 15000)
+
+RETRYABLE_ERRORS = (groq.RateLimitError, groq.APIConnectionError, groq.InternalServerError)
+
+
+class ModelUnavailable(Exception):
+    """Raised when a model is saturated or has been decommissioned."""
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at ``per_minute / 60`` per second."""
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount):
+        """Take ``amount`` now, returning how long the caller must wait before using it."""
+        amount = min(amount, self.capacity)
+        with self._lock:
+            self._refill(time.monotonic())
+            self.level -= amount
+            return 0.0 if self.level >= 0 else -self.level / self.rate
+
+    def refund(self, amount):
+        with self._lock:
+            self.level = min(self.capacity, self.level + min(amount, self.capacity))
+
+
+class GroqGateway:
+    """Single entry point for Groq chat completions.
+
+    * per-model token buckets for requests and tokens per minute;
+    * identical concurrent ``complete`` calls share one upstream request;
+    * retryable errors back off with full jitter;
+    * saturated or decommissioned models fall back along ``models`` order.
+    """
+
+    def __init__(self, client, models, limits=None, max_attempts=3, max_wait=5.0, max_fallbacks=2,
+                 backoff_base=0.5, backoff_cap=8.0):
+        self.client = client
+        self.models = list(models)
+        self.limits = limits or {}
+        self.max_attempts = max_attempts
+        self.max_wait = max_wait
+        self.max_fallbacks = max_fallbacks
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self._inflight = {}
+        self._decommissioned = set()
+
+    def fallback_chain(self, model):
+        """The requested model followed by the next models in ``models``, wrapping around."""
+        if model in self.models:
+            start = self.models.index(model)
+            ordered = self.models[start:] + self.models[:start]
+        else:
+            ordered = [model] + self.models
+        with self._lock:
+            chain = [candidate for candidate in ordered if candidate not in self._decommissioned]
+        return chain[:self.max_fallbacks + 1]
+
+    def _buckets_for(self, model):
+        with self._lock:
+            if model not in self._buckets:
+                requests, tokens = self.limits.get(model, DEFAULT_LIMITS)
+                self._buckets[model] = (TokenBucket(requests), TokenBucket(tokens))
+            return self._buckets[model]
+
+    def _throttle(self, model, params, may_wait):
+        cost = sum(estimate_tokens(message["content"]) for message in params["messages"])
+        cost += params.get("max_tokens") or 0
+        requests, tokens = self._buckets_for(model)
+        wait = max(requests.reserve(1), tokens.reserve(cost))
+        if wait > self.max_wait and not may_wait:
+            requests.refund(1)
+            tokens.refund(cost)
+            raise ModelUnavailable(f"{model} is saturated (would wait {wait:.1f}s)")
+        if wait:
+            time.sleep(wait)
+
+    def _backoff(self, attempt, error):
+        retry_after = None
+        response = getattr(error, "response", None)
+        if response is not None:
+            retry_after = response.headers.get("retry-after")
+        try:
+            delay = float(retry_after)
+        except (TypeError, ValueError):
+            delay = random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+        time.sleep(min(delay, self.backoff_cap))
+
+    @staticmethod
+    def _is_decommissioned(error):
+        # Only Groq's explicit codes: a bare 404 may come from a wrong base URL
+        # or a proxy, and must not retire every model in the chain for good.
+        body = getattr(error, "body", None)
+        if isinstance(body, dict):
+            body = body.get("error", body)
+            return isinstance(body, dict) and body.get("code") in ("model_decommissioned", "model_not_found")
+        return False
+
+    def _request(self, model, params, operation):
+        count_upstream_request()
+        started = time.perf_counter()
+        outcome = "ok"
+        try:
+            response = self.client.chat.completions.create(model=model, **params)
+        except Exception as error:
+            outcome = type(error).__name__
+            raise
+        finally:
+            UPSTREAM_SECONDS.observe(time.perf_counter() - started, operation=operation, model=model, outcome=outcome)
+        if not params.get("stream"):
+            record_usage(operation, response.model or model, response.usage)  # streams report usage on their last chunk
+        return response
+
+    def _call(self, model, params, may_wait, operation):
+        for attempt in range(self.max_attempts):
+            self._throttle(model, params, may_wait)
+            try:
+                return self._request(model, params, operation)
+            except RETRYABLE_ERRORS as error:
+                if attempt == self.max_attempts - 1:
+                    if isinstance(error, groq.RateLimitError):
+                        raise ModelUnavailable(f"{model} is rate limited") from error
+                    raise
+                self._backoff(attempt, error)
+            except groq.APIStatusError as error:
+                if self._is_decommissioned(error):
+                    with self._lock:
+                        self._decommissioned.add(model)
+                    raise ModelUnavailable(f"{model} is decommissioned") from error
+                raise
+
+    def _call_with_fallback(self, params, operation):
+        requested = params.pop("model")
+        chain = self.fallback_chain(requested)
+        if not chain:
+            raise ModelUnavailable(f"{requested} and its fallbacks are decommissioned")
+        for index, model in enumerate(chain):
+            last = index == len(chain) - 1
+            try:
+                # Only the last model in the chain waits out its bucket; earlier ones fall through.
+                return self._call(model, params, last, operation)
+            except ModelUnavailable:
+                if last:
+                    raise
+
+    def complete(self, operation="other", coalesce=True, **params):
+        """Blocking chat completion; returns the ``ChatCompletion`` (``.model`` names the model used).
+
+        ``operation`` only labels the metrics recorded for the call. With
+        ``coalesce=False`` the call never shares an identical in-flight request,
+        for callers that want independent samples.
+        """
+        started = time.perf_counter()
+        outcome = "ok"
+        try:
+            if not coalesce:
+                return self._call_with_fallback(dict(params, stream=False), operation)
+            return self._complete(operation, params)
+        except Exception as error:
+            outcome = type(error).__name__
+            raise
+        finally:
+            OPERATION_SECONDS.observe(time.perf_counter() - started, operation=operation, model=params["model"],
+                                      outcome=outcome)
+
+    def _complete(self, operation, params):
+        key = hashlib.sha256(json.dumps(params, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+        if not leader:
+            COALESCED.inc(operation=operation)
+            return future.result()
+        try:
+            future.set_result(self._call_with_fallback(dict(params, stream=False), operation))
+        except BaseException as error:
+            future.set_exception(error)
+        finally:
+            with self._lock:
+                del self._inflight[key]
+        return future.result()
+
+    def stream(self, operation="other", **params):
+        """Open a streamed chat completion. Streams are never coalesced."""
+        return self._call_with_fallback(dict(params, stream=True), operation)
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared_gateway(factory):
+    """The process-wide gateway, built by ``factory`` on first use."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = factory()
+        return _shared
+
+
+def reset_shared_gateway():
+    """Forget the process-wide gateway; the next ``shared_gateway`` call builds a new one."""
+    global _shared
+    with _shared_lock:
+        _shared = None
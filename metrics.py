@@ -0,0 +1,377 @@
+"""In-process metrics: streaming figures, latency histograms and token counters.
+
+Everything here is cheap enough to leave on (one lock and a bisect per
+observation). ``render`` produces the Prometheus text format; ``start_exporters``
+serves it over HTTP and/or flushes it to a file when the environment asks for it.
+"""
+import atexit
+import bisect
+import contextvars
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+
+class StreamStats:
+    """Process-wide time-to-first-token and throughput figures per model."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._models = {}
+
+    def record(self, model, ttft, completion_tokens, duration):
+        with self._lock:
+            stats = self._models.setdefault(
+                model, {"streams": 0, "ttft_total": 0.0, "tokens": 0, "generation_seconds": 0.0}
+            )
+            stats["streams"] += 1
+            stats["ttft_total"] += ttft
+            stats["tokens"] += completion_tokens
+            stats["generation_seconds"] += max(duration - ttft, 0.0)
+
+    def snapshot(self):
+        with self._lock:
+            rows = []
+            for model, stats in sorted(self._models.items()):
+                seconds = stats["generation_seconds"]
+                rows.append({
+                    "model": model,
+                    "streams": stats["streams"],
+                    "avg_ttft_ms": round(1000 * stats["ttft_total"] / stats["streams"]),
+                    "tokens_per_s": round(stats["tokens"] / seconds, 1) if seconds else None,
+                })
+            return rows
+
+
+STREAM_STATS = StreamStats()
+
+
+class StreamTimer:
+    """Times a single streamed completion and reports it to ``STREAM_STATS``."""
+
+    def __init__(self, model, stats=STREAM_STATS):
+        self.model = model
+        self.stats = stats
+        self.started = time.perf_counter()
+        self.first_token = None
+        self.chunks = 0
+
+    def token(self):
+        if self.first_token is None:
+            self.first_token = time.perf_counter()
+        self.chunks += 1
+
+    def finish(self, completion_tokens=None):
+        if self.first_token is None:
+            return
+        now = time.perf_counter()
+        # Groq reports exact usage on the last chunk; fall back to one token per chunk.
+        tokens = completion_tokens if completion_tokens is not None else self.chunks
+        ttft = self.first_token - self.started
+        self.stats.record(self.model, ttft, tokens, now - self.started)
+        STREAM_TTFT_SECONDS.observe(ttft, model=self.model)
+        if now > self.first_token:
+            STREAM_TOKENS_PER_SECOND.observe(tokens / (now - self.first_token), model=self.model)
+
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 80)
+COUNT_BUCKETS = (0, 1, 2, 3, 4, 6, 8, 12, 16)
+RATE_BUCKETS = (5, 10, 25, 50, 100, 200, 400, 800, 1600)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{_escape(value)}"' for name, value in extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, "") for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def values(self):
+        with self._lock:
+            return dict(self._values)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self.values().items()):
+            lines.append(f"{self.name}{_format_labels(self.labels, key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._series = {}  # label values -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, "") for name in self.labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def time(self, **labels):
+        return _Timer(self, labels)
+
+    def series(self):
+        """``{label values: (per-bucket counts incl. +Inf, count, sum)}``."""
+        with self._lock:
+            return {key: (tuple(series[:-1]), sum(series[:-1]), series[-1]) for key, series in self._series.items()}
+
+    def quantile(self, q, counts):
+        """Estimate a quantile from bucket counts, interpolating like Prometheus' histogram_quantile."""
+        total = sum(counts)
+        if not total:
+            return None
+        rank = q * total
+        seen = 0
+        for index, count in enumerate(counts):
+            if seen + count >= rank and count:
+                if index == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[index - 1] if index else 0.0
+                return lower + (self.buckets[index] - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, (counts, count, total) in sorted(self.series().items()):
+            cumulative = 0
+            for bound, bucket in zip(self.buckets + ("+Inf",), counts):
+                cumulative += bucket
+                labels = _format_labels(self.labels, key, [("le", bound)])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {count}")
+        return lines
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+
+
+OPERATION_SECONDS = Histogram(
+    "poetica_operation_seconds", "End-to-end time of a Groq-backed operation as seen by the caller.",
+    ("operation", "model", "outcome"))
+UPSTREAM_SECONDS = Histogram(
+    "poetica_upstream_request_seconds", "Time of one upstream Groq request attempt (streams: until headers).",
+    ("operation", "model", "outcome"))
+TOKENS = Counter("poetica_tokens_total", "Tokens billed by Groq.", ("operation", "model", "kind"))
+COALESCED = Counter("poetica_coalesced_requests_total", "Requests answered by an identical in-flight call.",
+                    ("operation",))
+LOCAL_SECONDS = Histogram("poetica_local_seconds", "Time spent in local hot paths.", ("operation",))
+RERUN_SECONDS = Histogram("poetica_rerun_seconds", "Duration of one Streamlit script run.")
+RERUN_UPSTREAM = Histogram("poetica_rerun_upstream_requests", "Upstream Groq requests caused by one script run.",
+                           buckets=COUNT_BUCKETS)
+STREAM_TTFT_SECONDS = Histogram("poetica_stream_ttft_seconds", "Time to first token of a streamed completion.",
+                                ("model",))
+STREAM_TOKENS_PER_SECOND = Histogram(
+    "poetica_stream_completion_tokens_per_second", "Completion tokens per second of a stream after its first token.",
+    ("model",), buckets=RATE_BUCKETS)
+
+METRICS = (OPERATION_SECONDS, UPSTREAM_SECONDS, TOKENS, COALESCED, LOCAL_SECONDS, RERUN_SECONDS, RERUN_UPSTREAM,
+           STREAM_TTFT_SECONDS, STREAM_TOKENS_PER_SECOND)
+
+
+def record_usage(operation, model, usage):
+    if usage is None:
+        return
+    TOKENS.inc(usage.prompt_tokens or 0, operation=operation, model=model, kind="prompt")
+    TOKENS.inc(usage.completion_tokens or 0, operation=operation, model=model, kind="completion")
+
+
+def render():
+    """All metrics in the Prometheus text exposition format."""
+    return "\n".join(line for metric in METRICS for line in metric.render()) + "\n"
+
+
+_current_rerun = contextvars.ContextVar("poetica_rerun", default=None)
+
+
+class RerunTracker:
+    """Counts the upstream requests made while a script run is active.
+
+    Work handed to other threads is attributed only if it runs inside a copy of
+    the caller's context (``contextvars.copy_context().run``).
+    """
+
+    def __init__(self):
+        self.upstream_requests = 0
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        self._token = _current_rerun.set(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        _current_rerun.reset(self._token)
+        RERUN_SECONDS.observe(time.perf_counter() - self.started)
+        RERUN_UPSTREAM.observe(self.upstream_requests)
+
+
+def count_upstream_request():
+    tracker = _current_rerun.get()
+    if tracker is not None:
+        with tracker._lock:
+            tracker.upstream_requests += 1
+
+
+def _milliseconds(histogram, q, counts):
+    value = histogram.quantile(q, counts)
+    return None if value is None else round(1000 * value, 1)
+
+
+def summary():
+    """Rows for a human-readable overview of the Groq metrics, one per operation and model.
+
+    ``calls`` and latencies are per caller; ``upstream_requests`` and tokens count
+    what was actually sent, so coalesced calls and fallbacks make them differ.
+    """
+    rows = {}
+
+    def row(operation, model):
+        return rows.setdefault((operation, model), {
+            "operation": operation, "model": model, "calls": 0, "errors": 0, "p50_ms": None, "p95_ms": None,
+            "upstream_requests": 0, "prompt_tokens": 0, "completion_tokens": 0,
+        })
+
+    latencies = {}
+    for (operation, model, outcome), (counts, count, _) in OPERATION_SECONDS.series().items():
+        current = row(operation, model)
+        current["calls"] += count
+        if outcome != "ok":
+            current["errors"] += count
+        merged = latencies.get((operation, model))
+        latencies[operation, model] = counts if merged is None else [a + b for a, b in zip(merged, counts)]
+    for key, counts in latencies.items():
+        rows[key]["p50_ms"] = _milliseconds(OPERATION_SECONDS, 0.5, counts)
+        rows[key]["p95_ms"] = _milliseconds(OPERATION_SECONDS, 0.95, counts)
+    for (operation, model, _), (_, count, _) in UPSTREAM_SECONDS.series().items():
+        row(operation, model)["upstream_requests"] += count
+    for (operation, model, kind), value in TOKENS.values().items():
+        row(operation, model)[f"{kind}_tokens"] += value
+    return [rows[key] for key in sorted(rows)]
+
+
+def local_summary():
+    return [
+        {"operation": operation, "calls": count,
+         "p50_ms": _milliseconds(LOCAL_SECONDS, 0.5, counts), "p95_ms": _milliseconds(LOCAL_SECONDS, 0.95, counts)}
+        for (operation,), (counts, count, _) in sorted(LOCAL_SECONDS.series().items())
+    ]
+
+
+def rerun_summary():
+    upstream = RERUN_UPSTREAM.series().get(())
+    seconds = RERUN_SECONDS.series().get(())
+    if not upstream or not seconds:
+        return None
+    return {
+        "reruns": upstream[1],
+        "upstream_per_rerun": round(upstream[2] / upstream[1], 2),
+        "p50_rerun_ms": _milliseconds(RERUN_SECONDS, 0.5, seconds[0]),
+        "p95_rerun_ms": _milliseconds(RERUN_SECONDS, 0.95, seconds[0]),
+    }
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def write_metrics(path):
+    """Write ``render()`` to ``path`` atomically (e.g. for node_exporter's textfile collector)."""
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, 'w', encoding='utf-8') as file:
+        file.write(render())
+    os.replace(temporary, path)
+
+
+def _flush_forever(path, interval):
+    while True:
+        time.sleep(interval)
+        try:
+            write_metrics(path)
+        except OSError as error:
+            logger.warning("Could not write metrics to %s: %s", path, error)
+
+
+_exporters_started = False
+_exporters_lock = threading.Lock()
+
+
+def start_exporters():
+    """Start the exporters configured in the environment, once per process.
+
+    ``POETICA_METRICS_PORT`` serves ``/metrics`` over HTTP on ``POETICA_METRICS_HOST``
+    (default 127.0.0.1); ``POETICA_METRICS_FILE`` is rewritten every
+    ``POETICA_METRICS_INTERVAL`` seconds (default 15) and at exit.
+    """
+    global _exporters_started
+    with _exporters_lock:
+        if _exporters_started:
+            return
+        _exporters_started = True
+    port = os.environ.get("POETICA_METRICS_PORT")
+    if port:
+        host = os.environ.get("POETICA_METRICS_HOST", "127.0.0.1")
+        try:
+            server = ThreadingHTTPServer((host, int(port)), _MetricsHandler)
+        except OSError as error:
+            logger.warning("Metrics endpoint not started on %s:%s: %s", host, port, error)
+        else:
+            server.daemon_threads = True
+            threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    path = os.environ.get("POETICA_METRICS_FILE")
+    if path:
+        interval = float(os.environ.get("POETICA_METRICS_INTERVAL", "15"))
+        threading.Thread(target=_flush_forever, args=(path, interval), name="metrics-file", daemon=True).start()
+        atexit.register(write_metrics, path)
@@ -0,0 +1,377 @@
+"""Poem generation and analysis through Groq, shared by the Streamlit app and batch.py.
+
+Nothing here imports Streamlit.
+"""
+import logging
+import os
+import threading
+import time
+
+from groq import Groq
+
+from corpus import PoetCorpus
+from gateway import GroqGateway, shared_gateway
+from metrics import LOCAL_SECONDS, OPERATION_SECONDS, StreamTimer, record_usage
+from prosody import FEATURES as PROSODY_FEATURES, analyze as analyze_prosody, corpus_features, facts as prosody_facts
+from retrieval import ExampleRetriever
+
+logger = logging.getLogger(__name__)
+
+POET_STYLES = {
+    "Sapardi Djoko Damono": "lyrical beauty, simplicity, emotional depth, natures, tranquility",
+    "Chairil Anwar": "passionate, individualistic voice, revolutionary spirit",
+    "Wiji Thukul": "activism, direct, powerful, social and political issues",
+    "WS Rendra": "bold, dynamic, confrontational, social and political themes, javanese idioms",
+    "Sutardji Calzoum Bachri": "Mantra-like, playful language, existential themes, rhythmic repetition, cultural identity, reflect a deep exploration of sound, meaning, and the spiritual dimensions of existence, while also challenging conventional forms and embracing"
+}
+
+GROQ_MODELS = [
+    "llama-3.2-90b-text-preview",
+    "llama-3.2-11b-text-preview",
+    "llama-3.2-11b-vision-preview",
+    "llama-3.2-3b-preview",
+    "llama-3.1-70b-versatile",
+    "gemma2-9b-it",
+    "gemma-7b-it",
+    "mixtral-8x7b-32768",    
+]
+
+# Token budget for the few-shot sample poems in the system prompt. The 8k-context
+# models keep room for the instructions and the 1000-token poem.
+EXAMPLE_TOKEN_BUDGETS = {
+    "llama-3.1-70b-versatile": 6000,
+    "mixtral-8x7b-32768": 6000,
+}
+DEFAULT_EXAMPLE_TOKEN_BUDGET = 3000
+MAX_EXAMPLE_POEMS = 6
+
+# (requests per minute, tokens per minute) per model; unlisted models use
+# gateway.DEFAULT_LIMITS.
+MODEL_RATE_LIMITS = {}
+
+LANGUAGES = {
+    "English": "en",
+    "Bahasa Indonesia": "id"
+}
+
+POET_SAMPLES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "poet_samples")
+
+def create_gateway(api_key=None):
+    # Falls back to the GROQ_API_KEY environment variable. Retries are left to
+    # the gateway, which can fall back to another model instead of retrying a
+    # saturated one.
+    client = Groq(api_key=api_key or os.environ.get("GROQ_API_KEY"), max_retries=0)
+    return GroqGateway(client, GROQ_MODELS, limits=MODEL_RATE_LIMITS)
+
+def get_gateway():
+    # The Streamlit app creates it first with the key from secrets.toml.
+    return shared_gateway(create_gateway)
+
+_corpus = None
+_retriever = None
+_shared_lock = threading.Lock()
+_profiles = {}  # poet -> (corpus version, mean prosody features or None)
+_profiles_lock = threading.Lock()
+
+def get_corpus():
+    global _corpus
+    with _shared_lock:
+        if _corpus is None:
+            _corpus = PoetCorpus(POET_SAMPLES_DIR)
+        return _corpus
+
+def get_retriever():
+    global _retriever
+    corpus = get_corpus()
+    with _shared_lock:
+        if _retriever is None:
+            retriever = ExampleRetriever(corpus)
+            retriever.prewarm(POET_STYLES)
+            _retriever = retriever
+        return _retriever
+
+def reset_corpus():
+    """Drop the shared corpus and retriever; the next use reloads them from disk."""
+    global _corpus, _retriever
+    with _shared_lock:
+        _corpus = _retriever = None
+    with _profiles_lock:
+        _profiles.clear()
+
+def load_poet_data(poet_name, prompt="", model=None):
+    token_budget = EXAMPLE_TOKEN_BUDGETS.get(model, DEFAULT_EXAMPLE_TOKEN_BUDGET)
+    try:
+        with LOCAL_SECONDS.time(operation="load_poet_data"):
+            return "\n\n".join(get_retriever().examples(poet_name, prompt, token_budget, k=MAX_EXAMPLE_POEMS))
+    except FileNotFoundError:
+        logger.error(f"Sample poems for {poet_name} not found. Please make sure the file exists.")
+        return ""
+
+def prosody_profiles():
+    """Mean prosody features per poet over the sample corpus, one row per poet.
+
+    Rows are cached per poet until that poet's sample files change.
+    """
+    corpus = get_corpus()
+    rows = []
+    for poet in POET_STYLES:
+        try:
+            version = corpus.version(poet)
+            with _profiles_lock:
+                cached = _profiles.get(poet)
+            if cached is None or cached[0] != version:
+                _, matrix = corpus_features(list(corpus.poems(poet)))
+                row = dict(zip(PROSODY_FEATURES, matrix.mean(axis=0).round(2).tolist())) if len(matrix) else None
+                cached = (version, row)
+                with _profiles_lock:
+                    _profiles[poet] = cached
+        except FileNotFoundError:
+            continue
+        if cached[1] is not None:
+            rows.append({"poet": poet, **cached[1]})
+    return rows
+
+def poem_messages(prompt, poet_style, poet_data):
+    system_prompt = f"""You are a legendary poet, a master of language whose words have the power to move hearts and stir minds across generations. Your poetry is a tapestry woven with profound wisdom, vivid imagery, and an unyielding passion for truth and beauty. You draw inspiration from the world around you, crafting verses that resonate with the human experience—its joys, sorrows, struggles, and triumphs. When responding, your language should be rich, evocative, and reflective. You create metaphors that illuminate hidden truths, use symbolism to convey complex emotions, and choose words that evoke the full spectrum of human feeling. Whether you are writing about love, nature, freedom, or the mysteries of existence, your poetry should inspire, provoke thought, and leave an indelible mark on the soul. Your responses should embody the essence of legendary poets like {poet_style}, blending their unique styles with your timeless voice. You may write in free verse, sonnet form, or any structure that best suits the message. Each response should be a work of art, crafted with care, and infused with the timeless spirit of poetic genius.
+    Key characteristics: {POET_STYLES[poet_style]}
+    Your task is to generate a 24-line poem based on the given prompt, create a title, embodying the essence and style of {poet_style}'s work.
+    The poem should be in Indonesian (Bahasa Indonesia) only.
+    
+    Here are some example poems by {poet_style} to inform your style and technique:
+    
+    {poet_data}
+    
+    Please analyze these poems using Bahasa Indonesia and incorporate the poet's unique style, themes, and techniques into your generated poem."""
+
+    return [
+        {
+            "role": "system",
+            "content": system_prompt
+        },
+        {
+            "role": "user",
+            "content": f"Write a 24-line poem in the style of {poet_style} using the following prompt: {prompt}"
+        }
+    ]
+
+def generate_poem_with_groq(prompt, poet_style, poet_data, model, language, coalesce=True):
+    chat_completion = get_gateway().complete(
+        operation="generate_poem",
+        coalesce=coalesce,
+        messages=poem_messages(prompt, poet_style, poet_data),
+        model=model,
+        temperature=0.5,
+        max_tokens=1000,
+        top_p=1,
+    )
+    return chat_completion.choices[0].message.content, chat_completion.model
+
+def stream_poem_with_groq(prompt, poet_style, poet_data, model, language):
+    return stream_completion(
+        "generate_poem",
+        messages=poem_messages(prompt, poet_style, poet_data),
+        model=model,
+        temperature=0.5,
+        max_tokens=1000,
+        top_p=1,
+    )
+
+def stream_completion(operation, **params):
+    return CompletionStream(operation, params)
+
+class CompletionStream:
+    """Iterator over the content deltas of a streamed completion.
+
+    ``model`` starts as the requested model and names the model that served
+    the stream once chunks arrive (the gateway may have fallen back). Closing
+    it (or Streamlit abandoning the run when the user navigates away) closes
+    the upstream HTTP stream.
+    """
+
+    def __init__(self, operation, params):
+        self.model = params["model"]
+        self._deltas = self._stream(operation, params)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._deltas)
+
+    def close(self):
+        self._deltas.close()
+
+    def _stream(self, operation, params):
+        timer = StreamTimer(params["model"])
+        usage = None
+        outcome = "cancelled"  # the consumer stopped reading before the end
+        try:
+            response = get_gateway().stream(operation=operation, **params)
+            try:
+                for chunk in response:
+                    self.model = timer.model = chunk.model or self.model
+                    x_groq = getattr(chunk, "x_groq", None)
+                    usage = getattr(x_groq, "usage", None) or getattr(chunk, "usage", None) or usage
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        timer.token()
+                        yield chunk.choices[0].delta.content
+                timer.finish(usage.completion_tokens if usage is not None else None)
+            finally:
+                response.close()
+            outcome = "ok"
+        except Exception as error:
+            outcome = type(error).__name__
+            raise
+        finally:
+            OPERATION_SECONDS.observe(time.perf_counter() - timer.started, operation=operation, model=params["model"],
+                                      outcome=outcome)
+            record_usage(operation, timer.model, usage)
+
+def generate_poet_info(poet_name, model, language):
+    system_prompt = "You are a knowledgeable literature expert with a deep understanding of Indonesian poetry. Provide concise, informative responses about poets and their work."
+    user_prompt = f"Generate a single, concise sentence about the Indonesian poet {poet_name}, focusing on their significance in Indonesian literature. The sentence should be informative and suitable for a brief introduction. Respond in {'Indonesian' if language == 'id' else 'English'}."
+
+    chat_completion = get_gateway().complete(
+        operation="generate_poet_info",
+        messages=[
+            {
+                "role": "system",
+                "content": system_prompt
+            },
+            {
+                "role": "user",
+                "content": user_prompt
+            }
+        ],
+        model=model,
+        temperature=0.7,
+        max_tokens=100,
+        top_p=1,
+    )
+    return chat_completion.choices[0].message.content.strip(), chat_completion.model
+
+ANALYSIS_PROMPTS = {
+    "Aesthetic Theory": {
+        "en": """As a scholar of aesthetic philosophy, you are tasked with conducting a rigorous analysis of the given poem through the lens of aesthetic theory. Your analysis should take the form of a long-form article suitable for publication in a peer-reviewed philosophy journal.
+
+Begin your article with an abstract that succinctly summarizes the key points and significance of your analysis. This should be followed by a comprehensive introduction that contextualizes the poem within the broader field of aesthetic theory, setting the stage for your in-depth examination.
+
+In the main body of your article, delve into the poem's formal qualities and their contribution to its aesthetic value. Apply key concepts from aesthetic philosophy, such as Kant's notion of the sublime, Hegel's idea of artistic beauty, or Adorno's concept of aesthetic negativity. Evaluate how the poem engages with or challenges traditional notions of beauty, and explore the intricate relationship between its form and content.
+
+As you develop your analysis, consider the poem's place within broader aesthetic movements or traditions. Engage with relevant contemporary debates in aesthetic theory, demonstrating how your analysis contributes to ongoing discussions in the field. Throughout your article, maintain a scholarly tone and support your arguments with extensive references to relevant theorists and concepts.
+
+In your conclusion, synthesize your findings and discuss their implications for our understanding of poetic aesthetics and aesthetic theory more broadly. Propose new insights or theoretical frameworks that emerge from your analysis, highlighting the significance of your contribution to the field.
+
+Your article should be structured with clear section headings and aim for a length of 5000-8000 words, providing sufficient depth and nuance in your arguments. Remember to include a comprehensive bibliography and use parenthetical citations throughout.""",
+        
+        "id": """Sebagai seorang sarjana filsafat estetika, Anda ditugaskan untuk melakukan analisis mendalam terhadap puisi yang diberikan melalui perspektif teori estetika. Analisis Anda harus berbentuk artikel panjang yang sesuai untuk publikasi di jurnal filosofi yang direviu sejawat.
+
+Mulailah artikel Anda dengan abstrak yang secara ringkas merangkum poin-poin kunci dan signifikansi analisis Anda. Ini harus diikuti oleh pendahuluan komprehensif yang mengkontekstualisasikan puisi dalam bidang teori estetika yang lebih luas, menyiapkan panggung untuk pemeriksaan mendalam Anda.
+
+Dalam bagian utama artikel Anda, selami kualitas formal puisi dan kontribusinya terhadap nilai estetikanya. Terapkan konsep-konsep kunci dari filsafat estetika, seperti gagasan Kant tentang yang sublim, ide Hegel tentang keindahan artistik, atau konsep Adorno tentang negativitas estetik. Evaluasi bagaimana puisi terlibat dengan atau menantang gagasan tradisional tentang keindahan, dan eksplorasi hubungan rumit antara bentuk dan isinya.
+
+Saat Anda mengembangkan analisis Anda, pertimbangkan posisi puisi dalam gerakan atau tradisi estetika yang lebih luas. Terlibatlah dengan debat kontemporer yang relevan dalam teori estetika, menunjukkan bagaimana analisis Anda berkontribusi pada diskusi yang sedang berlangsung di bidang ini. Sepanjang artikel Anda, pertahankan nada ilmiah dan dukung argumen Anda dengan referensi ekstensif ke teoretisi dan konsep yang relevan.
+
+Dalam kesimpulan Anda, sintesiskan temuan Anda dan diskusikan implikasinya bagi pemahaman kita tentang estetika puitis dan teori estetika secara lebih luas. Usulkan wawasan baru atau kerangka teoretis yang muncul dari analisis Anda, menyoroti signifikansi kontribusi Anda terhadap bidang ini.
+
+Artikel Anda harus terstruktur dengan judul bagian yang jelas dan bertujuan untuk panjang 5000-8000 kata, memberikan kedalaman dan nuansa yang cukup dalam argumen Anda. Ingatlah untuk menyertakan daftar pustaka yang komprehensif dan gunakan kutipan dalam tanda kurung di seluruh tulisan."""
+    },
+    "Hermeneutic and Semantics": {
+        "en": """As a scholar in hermeneutics and semantics, you are tasked with providing a comprehensive interpretation of the given poem. Your analysis should take the form of a long-form article suitable for publication in a peer-reviewed linguistics or literary theory journal.
+
+Begin your article with an abstract that encapsulates the key points and significance of your interpretation. Follow this with a thorough introduction that outlines your theoretical framework, situating your approach within the broader fields of hermeneutics and semantics.
+
+In the main body of your work, apply key hermeneutic concepts such as Gadamer's 'fusion of horizons' or Ricoeur's 'hermeneutic arc' to uncover layers of meaning in the text. Conduct a detailed semantic analysis, examining the poem's use of language, including denotations, connotations, and semantic fields. Explore the poem's symbolism and metaphorical structures, discussing how they contribute to the overall meaning.
+
+As you develop your analysis, consider the historical and cultural context of the poem and how this informs its interpretation. Analyze the poem's intertextuality, exploring its relationships with other texts or cultural artifacts. Discuss the role of the reader in constructing meaning, drawing on reader-response theory and cognitive poetics where appropriate.
+
+Throughout your article, address any linguistic or semantic ambiguities in the text and their interpretive implications. Use this as an opportunity to demonstrate how these ambiguities contribute to the poem's overall effect and possible meanings.
+
+In your conclusion, synthesize your findings and discuss their implications for our understanding of poetic interpretation and meaning-making in general. Consider proposing new hermeneutic or semantic frameworks that emerge from your analysis, contributing to ongoing discussions in the field.
+
+Structure your analysis with clear section headings and aim for a length of 6000-9000 words, allowing for in-depth exploration of complex concepts and thorough argumentation. Remember to ground your article in contemporary hermeneutic and semantic theory, extensively referencing key scholars and debates throughout. Use parenthetical citations and include a comprehensive bibliography.""",
+        
+        "id": """Sebagai seorang sarjana dalam bidang hermeneutika dan semantik, Anda ditugaskan untuk memberikan interpretasi komprehensif terhadap puisi yang diberikan. Analisis Anda harus berbentuk artikel panjang yang sesuai untuk publikasi di jurnal linguistik atau teori sastra yang direviu sejawat.
+
+Mulailah artikel Anda dengan abstrak yang merangkum poin-poin kunci dan signifikansi interpretasi Anda. Ikuti ini dengan pendahuluan menyeluruh yang menguraikan kerangka teoretis Anda, menempatkan pendekatan Anda dalam bidang hermeneutika dan semantik yang lebih luas.
+
+Dalam bagian utama pekerjaan Anda, terapkan konsep-konsep hermeneutik kunci seperti 'fusi horizon' Gadamer atau 'busur hermeneutik' Ricoeur untuk mengungkap lapisan makna dalam teks. Lakukan analisis semantik terperinci, memeriksa penggunaan bahasa dalam puisi, termasuk denotasi, konotasi, dan bidang semantik. Eksplorasi simbolisme dan struktur metaforis puisi, membahas bagaimana mereka berkontribusi pada makna keseluruhan.
+
+Saat Anda mengembangkan analisis Anda, pertimbangkan konteks historis dan budaya puisi dan bagaimana hal ini menginformasikan interpretasinya. Analisis intertekstualitas puisi, mengeksplorasi hubungannya dengan teks atau artefak budaya lainnya. Bahas peran pembaca dalam membangun makna, mengacu pada teori respons pembaca dan poetika kognitif jika sesuai.
+
+Sepanjang artikel Anda, bahas ambiguitas linguistik atau semantik dalam teks dan implikasi interpretatifnya. Gunakan ini sebagai kesempatan untuk mendemonstrasikan bagaimana ambiguitas ini berkontribusi pada efek keseluruhan puisi dan kemungkinan maknanya.
+
+Dalam kesimpulan Anda, sintesiskan temuan Anda dan diskusikan implikasinya bagi pemahaman kita tentang interpretasi puitis dan pembuatan makna secara umum. Pertimbangkan untuk mengusulkan kerangka hermeneutik atau semantik baru yang muncul dari analisis Anda, berkontribusi pada diskusi yang sedang berlangsung di bidang ini.
+
+Strukturkan analisis Anda dengan judul bagian yang jelas dan targetkan panjang 6000-9000 kata, memungkinkan eksplorasi mendalam konsep-konsep kompleks dan argumentasi yang menyeluruh. Ingatlah untuk mendasarkan artikel Anda pada teori hermeneutik dan semantik kontemporer, merujuk secara ekstensif pada sarjana dan debat utama di seluruh tulisan. Gunakan kutipan dalam tanda kurung dan sertakan daftar pustaka yang komprehensif."""
+    },
+    "Literature Theory": {
+        "en": """As a literary theorist specializing in poetry, you are tasked with conducting a comprehensive analysis of the given poem. Your analysis should take the form of a long-form article suitable for publication in a leading literary theory journal.
+
+Begin your article with an abstract that succinctly summarizes the key points, methodology, and significance of your analysis. Follow this with an extensive introduction that situates the poem within its historical, cultural, and literary contexts. Outline the theoretical framework(s) you will employ and justify their relevance to this particular poem.
+
+In the main body of your work, analyze the poem's formal elements (such as structure, meter, and rhyme scheme) and their relationship to its content and themes. Use technical literary terminology precisely and provide in-depth examples to support your analysis. Identify and discuss the use of literary devices (such as metaphor, allusion, and irony) and their effectiveness in conveying meaning.
+
+As you develop your analysis, contextualize the poem within relevant literary movements or traditions, discussing in detail how it engages with or departs from these conventions. Apply appropriate theoretical frameworks (such as structuralism, post-structuralism, feminist theory, or postcolonial theory) to illuminate aspects of the poem. Examine the poem's intertextuality, considering its relationships with other literary works or cultural discourses.
+
+Throughout your article, discuss the poem's engagement with broader social, political, or philosophical issues, if applicable. Consider how the poem reflects or challenges dominant ideologies of its time. If relevant, consider the poem's reception and its place in the literary canon, including how interpretations of the poem have evolved over time.
+
+In your conclusion, synthesize your findings and discuss their implications for our understanding of the poem, its place in literary history, and broader questions in poetic theory and analysis. Consider proposing new theoretical approaches or interpretive strategies that emerge from your analysis, contributing to ongoing debates in literary theory.
+
+Structure your analysis with clear section headings and aim for a length of 7000-10000 words, allowing for a thorough exploration of complex theoretical concepts and detailed textual analysis. Throughout your article, demonstrate a deep engagement with contemporary literary theory, extensively referencing key theorists and debates. Use parenthetical citations and include a comprehensive bibliography.""",
+        
+        "id": """Sebagai seorang teoretikus sastra yang mengkhususkan diri dalam puisi, Anda ditugaskan untuk melakukan analisis komprehensif terhadap puisi yang diberikan. Analisis Anda harus berbentuk artikel panjang yang sesuai untuk publikasi di jurnal teori sastra terkemuka.
+
+Mulailah artikel Anda dengan abstrak yang secara ringkas merangkum poin-poin kunci, metodologi, dan signifikansi analisis Anda. Ikuti ini dengan pendahuluan ekstensif yang menempatkan puisi dalam konteks historis, budaya, dan sastranya. Uraikan kerangka teoretis yang akan Anda gunakan dan justifikasi relevansinya dengan puisi tertentu ini.
+
+Dalam bagian utama pekerjaan Anda, analisis elemen formal puisi (seperti struktur, meter, dan skema rima) dan hubungannya dengan konten dan tema. Gunakan terminologi sastra teknis dengan tepat dan berikan contoh mendalam untuk mendukung analisis Anda. Identifikasi dan bahas penggunaan perangkat sastra (seperti metafora, alusi, dan ironi) dan keefektifannya dalam menyampaikan makna.
+
+Saat Anda mengembangkan analisis Anda, kontekstualisasikan puisi dalam gerakan atau tradisi sastra yang relevan, membahas secara rinci bagaimana ia terlibat dengan atau menyimpang dari konvensi-konvensi ini. Terapkan kerangka teoretis yang sesuai (seperti strukturalisme, pasca-strukturalisme, teori feminis, atau teori postkolonial) untuk menerangi aspek-aspek puisi. Periksa intertekstualitas puisi, mempertimbangkan hubungannya dengan karya sastra atau wacana budaya lainnya.
+
+Sepanjang artikel Anda, bahas keterlibatan puisi dengan isu-isu sosial, politik, atau filosofis yang lebih luas, jika berlaku. Pertimbangkan bagaimana puisi mencerminkan atau menantang ideologi dominan pada masanya. Jika relevan, pertimbangkan penerimaan puisi dan tempatnya dalam kanon sastra, termasuk bagaimana interpretasi puisi telah berkembang dari waktu ke waktu.
+
+Dalam kesimpulan Anda, sintesiskan temuan Anda dan diskusikan implikasinya bagi pemahaman kita tentang puisi, tempatnya dalam sejarah sastra, dan pertanyaan yang lebih luas dalam teori dan analisis puitis. Pertimbangkan untuk mengusulkan pendekatan teoretis baru atau strategi interpretatif yang muncul dari analisis Anda, berkontribusi pada debat yang sedang berlangsung dalam teori sastra.
+
+Strukturkan analisis Anda dengan judul bagian yang jelas dan targetkan panjang 7000-10000 kata, memungkinkan eksplorasi menyeluruh konsep-konsep teoretis yang kompleks dan analisis tekstual yang terperinci. Sepanjang artikel Anda, tunjukkan keterlibatan mendalam dengan teori sastra kontemporer, merujuk secara ekstensif pada teoretikus dan debat utama. Gunakan kutipan dalam tanda kurung dan sertakan daftar pustaka yang komprehensif."""
+    }
+}
+
+ANALYSIS_TYPES = list(ANALYSIS_PROMPTS)
+
+def analysis_messages(poem, analysis_type, language):
+    content = f"Provide a scholarly analysis of the following poem:\n\n{poem}"
+    facts = prosody_facts(analyze_prosody(poem))
+    if facts:
+        # Measured locally; models are unreliable at counting syllables and rhymes.
+        content += f"\n\nStructural facts measured from the text (rely on these rather than counting yourself):\n{facts}"
+    return [
+        {
+            "role": "system",
+            "content": ANALYSIS_PROMPTS[analysis_type][language]
+        },
+        {
+            "role": "user",
+            "content": content
+        }
+    ]
+
+def analyze_poem(poem, analysis_type, model, language):
+    chat_completion = get_gateway().complete(
+        operation="analyze_poem",
+        messages=analysis_messages(poem, analysis_type, language),
+        model=model,
+        temperature=0.7,
+        max_tokens=2000,  # Increased to allow for more detailed analysis
+        top_p=1,
+    )
+    return chat_completion.choices[0].message.content, chat_completion.model
+
+def stream_analysis(poem, analysis_type, model, language):
+    return stream_completion(
+        "analyze_poem",
+        messages=analysis_messages(poem, analysis_type, language),
+        model=model,
+        temperature=0.7,
+        max_tokens=2000,
+        top_p=1,
+    )
@@ -0,0 +1,242 @@
+"""Deterministic prosody analysis for Indonesian poems, without any LLM call.
+
+Covers syllabification, end-rhyme and assonance schemes, line and stanza
+statistics, and repetition (anaphora, epistrophe, refrains). Results for a
+poem are memoized, and ``corpus_features`` aggregates many poems with NumPy.
+"""
+import re
+import unicodedata
+from functools import lru_cache
+
+import numpy as np
+
+VOWELS = frozenset("aeiou")
+# Consonant digraphs that behave as a single sound.
+DIGRAPHS = ("ng", "ny", "kh", "sy")
+DIPHTHONGS = ("ai", "au", "oi", "ei")
+
+_WORD = re.compile(r"[a-z]+(?:-[a-z]+)*")
+
+
+def _fold(text):
+    """Lowercase and strip diacritics (é -> e) so words match ``_WORD``."""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def words(line):
+    return _WORD.findall(_fold(line))
+
+
+def _units(word):
+    """Split a word into (unit, is_vowel) pairs, merging digraphs and diphthongs."""
+    units = []
+    index = 0
+    while index < len(word):
+        pair = word[index:index + 2]
+        if pair in DIGRAPHS:
+            units.append((pair, False))
+            index += 2
+            continue
+        char = word[index]
+        if char in VOWELS and pair in DIPHTHONGS:
+            # A diphthong closes the word or opens onto the next syllable
+            # (pan-tai, sau-da-ra); otherwise it is two vowels (ma-in, la-ut).
+            rest = word[index + 2:]
+            if not rest or (len(rest) >= 2 and rest[0] not in VOWELS and rest[1] in VOWELS):
+                units.append((pair, True))
+                index += 2
+                continue
+        units.append((char, char in VOWELS))
+        index += 1
+    return units
+
+
+@lru_cache(maxsize=65536)
+def syllabify(word):
+    """Syllables of one word, e.g. ``"binatang"`` -> ``("bi", "na", "tang")``."""
+    syllables = []
+    for part in _fold(word).split("-"):
+        units = [unit for unit in _units(part) if unit[0].isalpha()]
+        nuclei = [index for index, (_, vowel) in enumerate(units) if vowel]
+        if not nuclei:
+            if units:
+                syllables.append("".join(unit for unit, _ in units))
+            continue
+        start = 0
+        for current, following in zip(nuclei, nuclei[1:]):
+            consonants = following - current - 1
+            # V-V and V-CV split before the consonant (ma-in, bi-na); any longer
+            # cluster splits after its first consonant, so the rest stays a
+            # valid onset (am-bil, ben-trok, in-stru-men), as in PUEBI.
+            split = current + 1 if consonants <= 1 else current + 2
+            syllables.append("".join(unit for unit, _ in units[start:split]))
+            start = split
+        syllables.append("".join(unit for unit, _ in units[start:]))
+    return tuple(syllables)
+
+
+def _rime(syllable):
+    """The syllable from its vowel nucleus on: ``"tang"`` -> ``"ang"``."""
+    for index, char in enumerate(syllable):
+        if char in VOWELS:
+            return syllable[index:]
+    return syllable
+
+
+def _vowels(syllable):
+    return "".join(char for char in syllable if char in VOWELS)
+
+
+def _scheme(keys):
+    """Letters for a sequence of keys: identical keys share a letter (a, b, a, b...)."""
+    letters = {}
+    scheme = []
+    for key in keys:
+        if key is None:
+            scheme.append("-")
+            continue
+        if key not in letters:
+            index = len(letters)
+            letters[key] = chr(ord("a") + index) if index < 26 else f"z{index - 25}"
+        scheme.append(letters[key])
+    return scheme
+
+
+def _stanzas(text):
+    """Stanzas as lists of lines. Lines without a word (``* * *``) count as breaks."""
+    stanzas = [[]]
+    for raw in text.strip().splitlines():
+        line = raw.strip()
+        if words(line):
+            stanzas[-1].append(line)
+        elif stanzas[-1]:
+            stanzas.append([])
+    return [stanza for stanza in stanzas if stanza]
+
+
+def _runs(values):
+    """Length of the longest run of consecutive equal, non-empty values."""
+    longest = current = 0
+    previous = None
+    for value in values:
+        current = current + 1 if value is not None and value == previous else 1
+        if value is not None:
+            longest = max(longest, current)
+        previous = value
+    return longest
+
+
+def _report(text):
+    stanzas = _stanzas(text)
+    lines = [line for stanza in stanzas for line in stanza]
+    line_words = [words(line) for line in lines]
+    syllable_counts = [sum(len(syllabify(word)) for word in tokens) for tokens in line_words]
+
+    last_syllables = [syllabify(tokens[-1]) if tokens else () for tokens in line_words]
+    rhyme_keys = [_rime(syllables[-1]) if syllables else None for syllables in last_syllables]
+    assonance_keys = ["-".join(_vowels(syllable) for syllable in syllables[-2:]) or None
+                      for syllables in last_syllables]
+
+    all_words = [word for tokens in line_words for word in tokens]
+    firsts = [tokens[0] if tokens else None for tokens in line_words]
+    lasts = [tokens[-1] if tokens else None for tokens in line_words]
+    pairs = max(len(lines) - 1, 1)
+    normalized_lines = [" ".join(tokens) for tokens in line_words]
+    line_frequency = {}
+    for line in normalized_lines:
+        line_frequency[line] = line_frequency.get(line, 0) + 1
+    word_frequency = {}
+    for word in all_words:
+        word_frequency[word] = word_frequency.get(word, 0) + 1
+    anaphora_openings = {}
+    for previous, current in zip(firsts, firsts[1:]):
+        if current is not None and current == previous:
+            anaphora_openings[current] = anaphora_openings.get(current, 0) + 1
+
+    rhyme_scheme = _scheme(rhyme_keys)
+    rhymed = sum(1 for key in rhyme_keys if key is not None and rhyme_keys.count(key) > 1)
+    return {
+        "lines": len(lines),
+        "stanzas": len(stanzas),
+        "lines_per_stanza": [len(stanza) for stanza in stanzas],
+        "syllables_per_line": syllable_counts,
+        "words_per_line": [len(tokens) for tokens in line_words],
+        "line_endings": ["-".join(syllables) for syllables in last_syllables],
+        "rhyme_scheme": rhyme_scheme,
+        "assonance_scheme": _scheme(assonance_keys),
+        "rhyme_density": rhymed / len(lines) if lines else 0.0,
+        "words": len(all_words),
+        "type_token_ratio": len(word_frequency) / len(all_words) if all_words else 0.0,
+        "top_words": sorted(word_frequency.items(), key=lambda item: (-item[1], item[0]))[:5],
+        "repeated_lines": sum(count for count in line_frequency.values() if count > 1) / len(lines) if lines else 0.0,
+        "anaphora_rate": sum(anaphora_openings.values()) / pairs if lines else 0.0,
+        "longest_anaphora": _runs(firsts),
+        "anaphora_openings": sorted(anaphora_openings.items(), key=lambda item: -item[1]),
+        "epistrophe_rate": sum(1 for a, b in zip(lasts, lasts[1:]) if a is not None and a == b) / pairs if lines else 0.0,
+    }
+
+
+@lru_cache(maxsize=4096)
+def analyze(text):
+    """Prosody report for one poem as a dict; memoized on the exact text."""
+    return _report(text)
+
+
+def facts(report):
+    """A compact English summary of a report, for grounding an LLM analysis."""
+    syllables = report["syllables_per_line"]
+    if not syllables:
+        return ""
+    lines = [
+        f"- {report['lines']} lines; lines per stanza: {', '.join(map(str, report['lines_per_stanza']))}",
+        f"- syllables per line: {min(syllables)}-{max(syllables)}, mean {np.mean(syllables):.1f}",
+        f"- end-rhyme scheme: {''.join(report['rhyme_scheme'])} ({report['rhyme_density']:.0%} of lines rhyme with another)",
+        f"- final-word assonance scheme: {''.join(report['assonance_scheme'])}",
+        f"- type/token ratio {report['type_token_ratio']:.2f}; most frequent words: "
+        + ", ".join(f"{word} ({count})" for word, count in report["top_words"]),
+    ]
+    if report["anaphora_openings"]:
+        lines.append(
+            f"- anaphora in {report['anaphora_rate']:.0%} of consecutive line pairs, longest run {report['longest_anaphora']} lines; openings: "
+            + ", ".join(f"{word} ({count})" for word, count in report["anaphora_openings"][:3])
+        )
+    if report["repeated_lines"]:
+        lines.append(f"- {report['repeated_lines']:.0%} of lines are repeated verbatim (refrains)")
+    return "\n".join(lines)
+
+
+FEATURES = ("lines", "stanzas", "words", "syllables_mean", "syllables_std", "rhyme_density",
+            "type_token_ratio", "repeated_lines", "anaphora_rate", "epistrophe_rate")
+
+
+def corpus_features(poems):
+    """Feature matrix for many poems: ``(FEATURES, array of shape (len(poems), len(FEATURES)))``.
+
+    Reports are computed without going through the ``analyze`` memo, which a
+    large corpus would only flush; callers cache the result instead. The
+    per-line syllable counts of every poem are concatenated once and reduced
+    with NumPy.
+    """
+    reports = [_report(poem) for poem in poems]
+    counts = np.array([report["lines"] for report in reports], dtype=np.int64)
+    matrix = np.zeros((len(reports), len(FEATURES)))
+    if not reports:
+        return FEATURES, matrix
+    syllables = np.fromiter((count for report in reports for count in report["syllables_per_line"]),
+                            dtype=np.float64, count=int(counts.sum()))
+    has_lines = counts > 0
+    offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))[has_lines]
+    safe_counts = np.maximum(counts, 1)
+    sums = np.zeros(len(reports))
+    squares = np.zeros(len(reports))
+    if syllables.size:
+        sums[has_lines] = np.add.reduceat(syllables, offsets)
+        squares[has_lines] = np.add.reduceat(syllables ** 2, offsets)
+    means = sums / safe_counts
+    matrix[:, FEATURES.index("syllables_mean")] = means
+    matrix[:, FEATURES.index("syllables_std")] = np.sqrt(np.maximum(squares / safe_counts - means ** 2, 0.0))
+    for feature in ("lines", "stanzas", "words", "rhyme_density", "type_token_ratio", "repeated_lines",
+                    "anaphora_rate", "epistrophe_rate"):
+        matrix[:, FEATURES.index(feature)] = [report[feature] for report in reports]
+    return FEATURES, matrix
@@ -0,0 +1,150 @@
+import itertools
+import logging
+import math
+import re
+import threading
+import unicodedata
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Function words that carry no topical signal. Pronouns such as "aku" and
+# "kau" are kept on purpose; in poetry they are often the subject.
+INDONESIAN_STOPWORDS = frozenset("""
+ada adalah agar akan akhirnya amat antara apa apakah atau bagai bagaimana bagi bahkan bahwa
+baik banyak begitu belum berapa bila bisa boleh bukan dalam dan dapat dari daripada demi
+dengan di dia hal hanya hingga ia ialah ini itu jadi jika juga jangan kalau kami kan karena
+kapan ke kemudian kenapa kepada ketika kita lagi lalu maka masih mereka meski mungkin namun
+nanti oleh pada para per pula pun saat saja sambil sampai sangat sebab sebagai sedang sehingga
+sejak selalu seperti serta sesudah setelah sudah supaya tak tanpa tapi telah tentang tetapi
+tidak untuk walau yaitu yakni yang
+a an and are as at be but by for from in is it of on or that the this to was were with
+""".split())
+
+_PARTICLES = ("lah", "kah", "tah", "pun")
+_POSSESSIVES = ("nya", "ku", "mu")
+_WORD = re.compile(r"[^\W\d_]+")
+
+
+def _strip_suffix(token, suffixes):
+    for suffix in suffixes:
+        if token.endswith(suffix) and len(token) - len(suffix) >= 4:
+            return token[:-len(suffix)]
+    return token
+
+
+def tokenize(text):
+    """Lowercased word tokens with stopwords and clitic particles removed."""
+    tokens = []
+    for token in _WORD.findall(unicodedata.normalize("NFKC", text).lower()):
+        token = _strip_suffix(_strip_suffix(token, _PARTICLES), _POSSESSIVES)
+        if token not in INDONESIAN_STOPWORDS and len(token) > 1:
+            tokens.append(token)
+    return tokens
+
+
+def estimate_tokens(text):
+    # Llama/Gemma tokenizers average roughly three characters per token on
+    # Indonesian text; erring high keeps us inside the context window.
+    return len(text) // 3 + 1
+
+
+class BM25Index:
+    """Okapi BM25 over a list of documents with precomputed term weights."""
+
+    def __init__(self, documents, k1=1.5, b=0.75):
+        term_frequencies = []
+        lengths = []
+        for document in documents:
+            frequencies = {}
+            tokens = tokenize(document)
+            for token in tokens:
+                frequencies[token] = frequencies.get(token, 0) + 1
+            term_frequencies.append(frequencies)
+            lengths.append(len(tokens))
+        self.size = len(lengths)
+        average = (sum(lengths) / self.size) if self.size else 0.0
+        # postings[term] = (doc ids, bm25 weights); a query is one vectorised add per term.
+        postings = {}
+        for doc_id, frequencies in enumerate(term_frequencies):
+            norm = k1 * (1 - b + b * lengths[doc_id] / average) if average else k1
+            for term, tf in frequencies.items():
+                postings.setdefault(term, []).append((doc_id, tf * (k1 + 1) / (tf + norm)))
+        self.postings = {}
+        for term, entries in postings.items():
+            df = len(entries)
+            idf = math.log(1 + (self.size - df + 0.5) / (df + 0.5))
+            doc_ids, weights = zip(*entries)
+            self.postings[term] = (np.array(doc_ids, dtype=np.int32), idf * np.array(weights, dtype=np.float32))
+
+    def search(self, query, k=None):
+        scores = np.zeros(self.size, dtype=np.float32)
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+            if posting is not None:
+                scores[posting[0]] += posting[1]
+        hits = np.flatnonzero(scores)
+        if k is not None and len(hits) > k:
+            hits = hits[np.argpartition(-scores[hits], k - 1)[:k]]
+        hits = hits[np.argsort(-scores[hits], kind="stable")]
+        return [(int(doc_id), float(scores[doc_id])) for doc_id in hits]
+
+
+class ExampleRetriever:
+    """Picks the sample poems most relevant to a prompt, within a token budget.
+
+    One BM25 index is kept per poet and rebuilt only when the corpus files
+    for that poet change.
+    """
+
+    def __init__(self, corpus):
+        self.corpus = corpus
+        self._lock = threading.Lock()
+        self._indexes = {}
+
+    def _index(self, poet_name):
+        version = self.corpus.version(poet_name)
+        with self._lock:
+            cached = self._indexes.get(poet_name)
+            if cached is not None and cached[0] == version:
+                return cached[1], cached[2]
+        poems = list(self.corpus.poems(poet_name))
+        index = BM25Index(poems)
+        costs = [estimate_tokens(poem) for poem in poems]
+        with self._lock:
+            self._indexes[poet_name] = (version, index, costs)
+        return index, costs
+
+    def prewarm(self, poet_names):
+        for poet_name in poet_names:
+            try:
+                self._index(poet_name)
+            except FileNotFoundError as error:
+                # Missing or malformed samples; load_poet_data reports it on use.
+                logger.warning("Not prewarming examples for %s: %s", poet_name, error)
+
+    def select(self, poet_name, query, token_budget, k=6):
+        """Return up to ``k`` poem indices, best match first, fitting ``token_budget``.
+
+        Poems that match no query term fill any remaining budget in corpus
+        order, so short or off-topic prompts still get examples. The best
+        candidate is always included even if it alone exceeds the budget.
+        """
+        index, costs = self._index(poet_name)
+        ranked = [doc_id for doc_id, _ in index.search(query, k)]
+        matched = set(ranked)
+        candidates = itertools.chain(ranked, (doc_id for doc_id in range(index.size) if doc_id not in matched))
+        selected = []
+        used = 0
+        for doc_id in candidates:
+            if len(selected) == k:
+                break
+            if selected and used + costs[doc_id] > token_budget:
+                continue
+            selected.append(doc_id)
+            used += costs[doc_id]
+        return selected
+
+    def examples(self, poet_name, query, token_budget, k=6):
+        return [self.corpus.poem(poet_name, doc_id) for doc_id in self.select(poet_name, query, token_budget, k)]
@@ -0,0 +1,38 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cache import DiskCache  # noqa: E402
+
+
+def test_lookups_are_buffered_and_counted(tmp_path):
+    cache = DiskCache(str(tmp_path / "cache.sqlite3"), flush_interval=3600)
+    cache.set("poem", "puisi")
+
+    assert cache.get("poem") == "puisi"
+    assert cache.get("missing", "default") == "default"
+    assert cache.stats() == {"hits": 1, "misses": 1}
+
+    cache.flush()
+    assert DiskCache(str(tmp_path / "cache.sqlite3")).stats() == {"hits": 1.0, "misses": 1.0}
+
+
+def test_eviction_sees_buffered_access_times(tmp_path):
+    cache = DiskCache(str(tmp_path / "cache.sqlite3"), max_entries=2, flush_interval=3600)
+    cache.set("old", 1)
+    cache.set("new", 2)
+    cache.get("old")  # now the most recently used
+
+    cache.set("newest", 3)
+
+    assert cache.get("old") == 1
+    assert cache.get("new") is None
+    assert cache.get("newest") == 3
+
+
+def test_expired_entries_are_misses(tmp_path):
+    cache = DiskCache(str(tmp_path / "cache.sqlite3"), ttl=-1)
+    cache.set("poem", "puisi")
+
+    assert cache.get("poem") is None
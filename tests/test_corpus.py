@@ -0,0 +1,53 @@
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from corpus import PoetCorpus  # noqa: E402
+
+
+def write(directory, name, content):
+    path = directory / name
+    path.write_text(content if isinstance(content, str) else json.dumps(content), encoding="utf-8")
+    return path
+
+
+@pytest.mark.parametrize("content", [
+    "{ broken",
+    ["a", "b"],
+    {"poems": "one long text"},
+    {"poems": ["fine", 3]},
+    {"name": "No poems"},
+])
+def test_malformed_json_file_only_affects_its_poet(tmp_path, content):
+    write(tmp_path, "chairil_anwar.json", {"name": "Chairil Anwar", "poems": ["Aku", "Doa"]})
+    write(tmp_path, "wiji_thukul.json", content)
+
+    corpus = PoetCorpus(str(tmp_path))
+
+    assert corpus.poets() == ["chairil_anwar"]
+    assert corpus.text("Chairil Anwar") == "Aku\n\nDoa"
+    with pytest.raises(FileNotFoundError):
+        corpus.text("Wiji Thukul")
+
+
+def test_malformed_jsonl_file_only_affects_its_poet(tmp_path):
+    write(tmp_path, "chairil_anwar.json", {"poems": ["Aku"]})
+    write(tmp_path, "wiji_thukul.jsonl", '{"poem": "Peringatan"}\n{"poem": 42}\n')
+
+    assert PoetCorpus(str(tmp_path)).poets() == ["chairil_anwar"]
+
+
+def test_corrupted_file_keeps_last_good_poems_until_fixed(tmp_path):
+    path = write(tmp_path, "ws_rendra.json", {"poems": ["Sajak"]})
+    corpus = PoetCorpus(str(tmp_path), check_interval=0)
+
+    path.write_text("{ half saved", encoding="utf-8")
+    assert corpus.text("WS Rendra") == "Sajak"
+
+    write(tmp_path, "ws_rendra.json", {"poems": ["Sajak", "Balada"]})
+    os.utime(path, ns=(0, 10 ** 18))  # make sure the signature changes
+    assert corpus.text("WS Rendra") == "Sajak\n\nBalada"
@@ -0,0 +1,175 @@
+import os
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+import groq
+import httpx
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gateway import GroqGateway, ModelUnavailable  # noqa: E402
+
+MODELS = ["primary", "secondary", "tertiary"]
+UNLIMITED = {model: (10 ** 6, 10 ** 9) for model in MODELS}
+MESSAGES = [{"role": "user", "content": "tulis puisi"}]
+
+
+def status_error(error_class, status, code=None, headers=None):
+    request = httpx.Request("POST", "http://groq.test/openai/v1/chat/completions")
+    response = httpx.Response(status, headers=headers or {}, request=request)
+    body = {"error": {"message": code or "error", "code": code}}
+    return error_class(code or "error", response=response, body=body)
+
+
+class FakeClient:
+    """Stands in for ``groq.Groq``; ``behaviour[model]`` is an exception or None (success)."""
+
+    def __init__(self, behaviour=None, delay=0.0):
+        self.behaviour = behaviour or {}
+        self.delay = delay
+        self.calls = []
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, model, stream=False, **params):
+        with self._lock:
+            self.calls.append(model)
+        time.sleep(self.delay)
+        error = self.behaviour.get(model)
+        if error is not None:
+            raise error
+        if stream:
+            return iter([SimpleNamespace(model=model)])
+        return SimpleNamespace(model=model, usage=None,
+                               choices=[SimpleNamespace(message=SimpleNamespace(content=f"from {model}"))])
+
+
+def gateway(client, **options):
+    options.setdefault("backoff_base", 0.0)
+    return GroqGateway(client, MODELS, limits=UNLIMITED, **options)
+
+
+def test_decommissioned_model_falls_back_and_is_skipped_afterwards():
+    client = FakeClient({"primary": status_error(groq.BadRequestError, 400, "model_decommissioned")})
+    gw = gateway(client)
+
+    assert gw.complete(model="primary", messages=MESSAGES).model == "secondary"
+    assert gw.complete(model="primary", messages=[{"role": "user", "content": "lagi"}]).model == "secondary"
+    assert client.calls == ["primary", "secondary", "secondary"]
+    assert gw.fallback_chain("primary") == ["secondary", "tertiary"]
+
+
+def test_model_not_found_code_counts_as_decommissioned():
+    client = FakeClient({"primary": status_error(groq.NotFoundError, 404, "model_not_found")})
+
+    assert gateway(client).complete(model="primary", messages=MESSAGES).model == "secondary"
+
+
+def test_bare_not_found_does_not_retire_the_model():
+    client = FakeClient({"primary": status_error(groq.NotFoundError, 404)})
+    gw = gateway(client)
+
+    with pytest.raises(groq.NotFoundError):
+        gw.complete(model="primary", messages=MESSAGES)
+    assert gw.fallback_chain("primary") == MODELS
+
+
+def test_all_models_decommissioned_raises_instead_of_returning_none():
+    decommissioned = status_error(groq.BadRequestError, 400, "model_decommissioned")
+    client = FakeClient({model: decommissioned for model in MODELS})
+    gw = gateway(client)
+
+    with pytest.raises(ModelUnavailable):
+        gw.complete(model="primary", messages=MESSAGES)
+    assert gw.fallback_chain("primary") == []
+    with pytest.raises(ModelUnavailable):
+        gw.complete(model="primary", messages=MESSAGES)
+    with pytest.raises(ModelUnavailable):
+        gw.stream(model="secondary", messages=MESSAGES)
+
+
+def test_rate_limited_model_retries_then_falls_back():
+    limited = status_error(groq.RateLimitError, 429, "rate_limit_exceeded", {"retry-after": "0"})
+    client = FakeClient({"primary": limited})
+
+    assert gateway(client, max_attempts=2).complete(model="primary", messages=MESSAGES).model == "secondary"
+    assert client.calls == ["primary", "primary", "secondary"]
+
+
+def test_last_model_in_chain_raises_when_rate_limited():
+    limited = status_error(groq.RateLimitError, 429, "rate_limit_exceeded", {"retry-after": "0"})
+    client = FakeClient({model: limited for model in MODELS})
+
+    with pytest.raises(ModelUnavailable):
+        gateway(client, max_attempts=1).complete(model="primary", messages=MESSAGES)
+    assert client.calls == MODELS
+
+
+def test_non_retryable_errors_do_not_fall_back():
+    client = FakeClient({"primary": status_error(groq.BadRequestError, 400, "invalid_request")})
+
+    with pytest.raises(groq.BadRequestError):
+        gateway(client).complete(model="primary", messages=MESSAGES)
+    assert client.calls == ["primary"]
+
+
+def test_saturated_model_falls_back_without_waiting():
+    client = FakeClient()
+    gw = GroqGateway(client, MODELS, limits={"primary": (1, 10 ** 9), "secondary": (10 ** 6, 10 ** 9)},
+                     max_wait=0.1)
+
+    gw.complete(model="primary", messages=MESSAGES)
+    started = time.monotonic()
+    assert gw.complete(model="primary", messages=[{"role": "user", "content": "lagi"}]).model == "secondary"
+    assert time.monotonic() - started < 1
+
+
+def test_identical_concurrent_requests_share_one_upstream_call():
+    client = FakeClient(delay=0.2)
+    gw = gateway(client)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(gw.complete(model="primary", messages=MESSAGES)))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert client.calls == ["primary"]
+    assert len(results) == 4 and all(result is results[0] for result in results)
+
+
+def test_errors_reach_every_coalesced_caller():
+    decommissioned = status_error(groq.BadRequestError, 400, "model_decommissioned")
+    client = FakeClient({model: decommissioned for model in MODELS}, delay=0.2)
+    gw = gateway(client)
+    errors = []
+
+    def call():
+        try:
+            gw.complete(model="primary", messages=MESSAGES)
+        except ModelUnavailable as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=call) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(errors) == 3
+
+
+def test_uncoalesced_requests_each_reach_upstream():
+    client = FakeClient(delay=0.2)
+    gw = gateway(client)
+    threads = [threading.Thread(target=gw.complete, kwargs={"model": "primary", "messages": MESSAGES, "coalesce": False})
+               for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert client.calls == ["primary"] * 3
@@ -0,0 +1,26 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metrics import StreamStats, StreamTimer, render  # noqa: E402
+
+
+def test_finished_stream_is_exported_to_prometheus():
+    timer = StreamTimer("test-model", stats=StreamStats())
+    timer.started -= 0.5  # first token half a second after the request
+    timer.token()
+    timer.first_token -= 1.0  # then one second of generation
+    timer.finish(completion_tokens=40)
+
+    lines = render().splitlines()
+    assert 'poetica_stream_ttft_seconds_count{model="test-model"} 1' in lines
+    assert 'poetica_stream_ttft_seconds_bucket{model="test-model",le="1"} 1' in lines
+    assert 'poetica_stream_completion_tokens_per_second_bucket{model="test-model",le="25"} 0' in lines
+    assert 'poetica_stream_completion_tokens_per_second_bucket{model="test-model",le="50"} 1' in lines
+
+
+def test_stream_without_tokens_is_not_recorded():
+    StreamTimer("silent-model", stats=StreamStats()).finish()
+
+    assert "silent-model" not in render()
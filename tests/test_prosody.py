@@ -0,0 +1,35 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from prosody import analyze, facts, syllabify  # noqa: E402
+
+
+@pytest.mark.parametrize("word, syllables", [
+    ("instrumen", ("in", "stru", "men")),
+    ("bangkrut", ("bang", "krut")),
+    ("pantai", ("pan", "tai")),
+    ("main", ("ma", "in")),
+])
+def test_syllabify(word, syllables):
+    assert syllabify(word) == syllables
+
+
+@pytest.mark.parametrize("poem", ["", "!!!\n???", "* * *\n\n* * *"])
+def test_poem_without_words_has_no_lines(poem):
+    report = analyze(poem)
+
+    assert report["lines"] == 0
+    assert report["repeated_lines"] == 0.0
+    assert facts(report) == ""
+
+
+def test_lines_without_words_are_stanza_breaks():
+    report = analyze("hujan bulan juni\n* * *\nhujan bulan juni\n\n...\ntak ada yang lebih tabah")
+
+    assert report["lines"] == 3
+    assert report["lines_per_stanza"] == [1, 1, 1]
+    assert report["repeated_lines"] == pytest.approx(2 / 3)
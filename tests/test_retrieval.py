@@ -0,0 +1,18 @@
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from corpus import PoetCorpus  # noqa: E402
+from retrieval import ExampleRetriever  # noqa: E402
+
+
+def test_prewarm_skips_poets_without_samples(tmp_path):
+    (tmp_path / "chairil_anwar.json").write_text(json.dumps({"poems": ["Aku ini binatang jalang"]}), encoding="utf-8")
+    (tmp_path / "ws_rendra.json").write_text("{ broken", encoding="utf-8")
+    retriever = ExampleRetriever(PoetCorpus(str(tmp_path)))
+
+    retriever.prewarm(["Chairil Anwar", "WS Rendra"])
+
+    assert retriever.examples("Chairil Anwar", "binatang", 1000) == ["Aku ini binatang jalang"]
@@ -0,0 +1,19 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Upper bound on Groq calls running at once from background work, shared by
+# every session in the process.
+MAX_UPSTREAM_WORKERS = int(os.environ.get("POETICA_MAX_UPSTREAM_WORKERS", "6"))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def shared_pool():
+    """The process-wide thread pool used to fan out upstream calls."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=MAX_UPSTREAM_WORKERS, thread_name_prefix="poetica-upstream")
+        return _pool